@@ -12,16 +12,20 @@ def createTable(name: str) -> DatedTable:
     TABLES.append(table)
     return table
 
+def getInterval(start: str, end: str) -> TimeInterval:
+    """ The interval between two DATETIME values as they are stored """
+
+    return TimeInterval.fromDatetimes(datetime.fromisoformat(start), datetime.fromisoformat(end))
+
 CONVENTIONTIME_TABLE = createTable("interviewTime")
 CONVENTIONTIME_START_COL = CONVENTIONTIME_TABLE.CreateColumn("start", DATETIME_TYPE, isPrimary=True)
 CONVENTIONTIME_END_COL = CONVENTIONTIME_TABLE.CreateColumn("end", DATETIME_TYPE)
 
-def AddConventionTime(cursor: SqliteDB, timeInt: TimeInterval):
-    cursor.InsertIntoTable(
-        CONVENTIONTIME_TABLE, {
-            CONVENTIONTIME_START_COL: [timeInt.time], 
-            CONVENTIONTIME_END_COL: [timeInt.end]
-        }
+def AddConventionTimes(cursor: SqliteDB, timeInts: list[TimeInterval]):
+    cursor.InsertMany(
+        CONVENTIONTIME_TABLE,
+        [CONVENTIONTIME_START_COL, CONVENTIONTIME_END_COL],
+        [(timeInt.getStartDatetime(), timeInt.getEndDatetime()) for timeInt in timeInts]
     )
 
 def GetConventionTimes(cursor: SqliteDB) -> list[TimeInterval]:
@@ -34,7 +38,7 @@ def GetConventionTimes(cursor: SqliteDB) -> list[TimeInterval]:
         getTime = lambda col: datetime.fromisoformat(timeObj[col.name])
         start = getTime(CONVENTIONTIME_START_COL)
         end = getTime(CONVENTIONTIME_END_COL)
-        conventionTimes.append(TimeInterval(start, end-start))
+        conventionTimes.append(TimeInterval.fromDatetimes(start, end))
     conventionTimes.sort(key = lambda t: t.time)
     return conventionTimes
 
@@ -44,34 +48,34 @@ COMPANY_COMPANYNAME_COL = COMPANY_TABLE.CreateColumn("companyName", VarCharType(
 COMPANYROOM_TABLE = createTable("companyRoom")
 COMPANYROOM_TABLE.CreateForeignKey(COMPANY_COMPANYNAME_COL, isPrimary=False)
 COMPANYROOM_ROOMNAME_COL = COMPANYROOM_TABLE.CreateColumn("roomName", VarCharType(50), isPrimary=True)
+COMPANYROOM_TABLE.CreateIndex([COMPANY_COMPANYNAME_COL])
 
-def AddCompanyRoom(cursor: SqliteDB, companyName: str, roomName: str):
-    if (not cursor.Exists(cursor.Q(
-        [COMPANY_COMPANYNAME_COL], 
-        COMPANY_TABLE,
-        {COMPANY_COMPANYNAME_COL: companyName}
-    ))):
-        cursor.InsertIntoTable(COMPANY_TABLE, {COMPANY_COMPANYNAME_COL: [companyName]})
+def AddCompanyRooms(cursor: SqliteDB, companyRooms: list[tuple[str, str]]):
+    """ Add the (company name, room name) rooms and the companies that don't exist yet """
 
-    cursor.InsertIntoTable(
-        COMPANYROOM_TABLE, {
-            COMPANY_COMPANYNAME_COL: [companyName],
-            COMPANYROOM_ROOMNAME_COL: [roomName]
-        }
+    existingCompanyNames = set((
+        c[COMPANY_COMPANYNAME_COL.name]
+        for c in cursor.FetchAll(cursor.Q([COMPANY_COMPANYNAME_COL], COMPANY_TABLE))
+    ))
+    newCompanyNames = dict.fromkeys( # ordered set
+        companyName for companyName, _ in companyRooms 
+        if companyName not in existingCompanyNames
     )
+    cursor.InsertMany(COMPANY_TABLE, [COMPANY_COMPANYNAME_COL], [(name,) for name in newCompanyNames])
 
-def GetCompanyRooms(cursor: SqliteDB) -> dict[str, str]:
-    roomsObj = cursor.FetchAll(cursor.Q(
+    cursor.InsertMany(
+        COMPANYROOM_TABLE,
         [COMPANY_COMPANYNAME_COL, COMPANYROOM_ROOMNAME_COL],
-        COMPANYROOM_TABLE
-    ))
+        companyRooms
+    )
 
+def GetCompanyRooms(cursor: SqliteDB) -> dict[str, list[str]]:
     rooms = {}
-    for roomObj in roomsObj:
-        companyName = roomObj[COMPANY_COMPANYNAME_COL.name]
-        roomName = roomObj[COMPANYROOM_ROOMNAME_COL.name]
-        rooms[companyName] = rooms.get(companyName, []) + [roomName]
-
+    for companyName, roomName in cursor.Iterate(cursor.Q(
+        [COMPANY_COMPANYNAME_COL, COMPANYROOM_ROOMNAME_COL],
+        COMPANYROOM_TABLE
+    )):
+        rooms.setdefault(companyName, []).append(roomName)
     return rooms
 
 ROOMINTERVIEW_TABLE = createTable("roomInterview")
@@ -80,14 +84,16 @@ ROOMINTERVIEW_LENGTH_COL = ROOMINTERVIEW_TABLE.CreateColumn("length", INTEGER_TY
 ROOMINTERVIEW_START_COL = ROOMINTERVIEW_TABLE.CreateColumn("start", DATETIME_TYPE)
 ROOMINTERVIEW_END_COL = ROOMINTERVIEW_TABLE.CreateColumn("end", DATETIME_TYPE)
 
-def AddRoom(cursor: SqliteDB, roomName: str, roomLen: str, interval: TimeInterval):
-    cursor.InsertIntoTable(
-        ROOMINTERVIEW_TABLE, {
-            COMPANYROOM_ROOMNAME_COL: [roomName],
-            ROOMINTERVIEW_LENGTH_COL: [roomLen],
-            ROOMINTERVIEW_START_COL: [interval.time],
-            ROOMINTERVIEW_END_COL: [interval.end]
-        }
+def AddRooms(cursor: SqliteDB, rooms: list[tuple[str, int, TimeInterval]]):
+    """ Add the (room name, interview length, interval) rooms """
+
+    cursor.InsertMany(
+        ROOMINTERVIEW_TABLE,
+        [COMPANYROOM_ROOMNAME_COL, ROOMINTERVIEW_LENGTH_COL, ROOMINTERVIEW_START_COL, ROOMINTERVIEW_END_COL],
+        [
+            (roomName, roomLen, interval.getStartDatetime(), interval.getEndDatetime()) 
+            for roomName, roomLen, interval in rooms
+        ]
     )
 
 def GetRoomsWithInterview(cursor: SqliteDB) -> set[str]:
@@ -120,7 +126,7 @@ def GetRoomIntervals(cursor: SqliteDB) -> dict[str, TimeInterval]:
         start = getTime(CONVENTIONTIME_START_COL)
         end = getTime(CONVENTIONTIME_END_COL)
 
-        roomIntervals[room] = (TimeInterval(start, end-start))
+        roomIntervals[room] = (TimeInterval.fromDatetimes(start, end))
     return roomIntervals
 
 ROOMBREAKS_TABLE = createTable("roomBreak")
@@ -128,30 +134,20 @@ ROOMBREAKS_TABLE.CreateForeignKey(COMPANYROOM_ROOMNAME_COL, isPrimary=True)
 ROOMBREAKS_START_COL = ROOMBREAKS_TABLE.CreateColumn("start", DATETIME_TYPE, isPrimary=True)
 ROOMBREAKS_END_COL = ROOMBREAKS_TABLE.CreateColumn("end", DATETIME_TYPE)
 
-def AddRoomBreak(cursor: SqliteDB,roomName: str, timeInt: TimeInterval):
-    cursor.InsertIntoTable(
-        ROOMBREAKS_TABLE, {
-            COMPANYROOM_ROOMNAME_COL: [roomName],
-            ROOMBREAKS_START_COL: [timeInt.time],
-            ROOMBREAKS_END_COL: [timeInt.end]
-        }
+def AddRoomBreaks(cursor: SqliteDB, roomBreaks: list[tuple[str, TimeInterval]]):
+    cursor.InsertMany(
+        ROOMBREAKS_TABLE,
+        [COMPANYROOM_ROOMNAME_COL, ROOMBREAKS_START_COL, ROOMBREAKS_END_COL],
+        [(roomName, timeInt.getStartDatetime(), timeInt.getEndDatetime()) for roomName, timeInt in roomBreaks]
     )
 
 def GetRoomBreaks(cursor: SqliteDB) -> dict[str, list[TimeInterval]]:
-    roomBreaksObj = cursor.FetchAll(cursor.Q(
+    roomBreaks = {}
+    for name, start, end in cursor.Iterate(cursor.Q(
         [COMPANYROOM_ROOMNAME_COL, ROOMBREAKS_START_COL, ROOMBREAKS_END_COL],
         ROOMBREAKS_TABLE
-    ))  
-
-    roomBreaks = {}
-    for roomBreakObj in roomBreaksObj:
-        name = roomBreakObj[COMPANYROOM_ROOMNAME_COL.name]
-        getTime = lambda col: datetime.fromisoformat(roomBreakObj[col.name])
-        start = getTime(ROOMBREAKS_START_COL)
-        end = getTime(ROOMBREAKS_END_COL)
-        timeInt = TimeInterval(start, end-start)
-
-        roomBreaks[name] = roomBreaks.get(name, []) + [timeInt]
+    )):
+        roomBreaks.setdefault(name, []).append(getInterval(start, end))
     return roomBreaks
 
 
@@ -161,14 +157,16 @@ COFFEECHAT_CAPACITY_COL = COFFEECHAT_TABLE.CreateColumn("capacity", INTEGER_TYPE
 COFFEECHAT_START_COL = COFFEECHAT_TABLE.CreateColumn("start", DATETIME_TYPE)
 COFFEECHAT_END_COL = COFFEECHAT_TABLE.CreateColumn("end", DATETIME_TYPE)
 
-def AddCoffeeChat(cursor: SqliteDB, roomName: str, capacity: str, interval: TimeInterval):
-    cursor.InsertIntoTable(
-        COFFEECHAT_TABLE, {
-            COMPANYROOM_ROOMNAME_COL: [roomName],
-            COFFEECHAT_CAPACITY_COL: [capacity],
-            COFFEECHAT_START_COL: [interval.time],
-            COFFEECHAT_END_COL: [interval.end]
-        }
+def AddCoffeeChats(cursor: SqliteDB, coffeeChats: list[tuple[str, str, TimeInterval]]):
+    """ Add the (room name, capacity, interval) coffee chats """
+
+    cursor.InsertMany(
+        COFFEECHAT_TABLE,
+        [COMPANYROOM_ROOMNAME_COL, COFFEECHAT_CAPACITY_COL, COFFEECHAT_START_COL, COFFEECHAT_END_COL],
+        [
+            (roomName, capacity, interval.getStartDatetime(), interval.getEndDatetime()) 
+            for roomName, capacity, interval in coffeeChats
+        ]
     )
 
 def GetCoffeeChatTimes(cursor: SqliteDB) -> dict[str, TimeInterval]:
@@ -184,7 +182,7 @@ def GetCoffeeChatTimes(cursor: SqliteDB) -> dict[str, TimeInterval]:
         start = getTime(ROOMBREAKS_START_COL)
         end = getTime(ROOMBREAKS_END_COL)
 
-        coffeeChatTimes[room] = TimeInterval(start, end-start)
+        coffeeChatTimes[room] = TimeInterval.fromDatetimes(start, end)
     return coffeeChatTimes
 
 def GetCoffeeChatCapacities(cursor: SqliteDB) -> dict[str, int]:
@@ -197,18 +195,49 @@ def GetCoffeeChatCapacities(cursor: SqliteDB) -> dict[str, int]:
         for obj in coffeeChatsObj
     }
 
+def IterateRooms(cursor: SqliteDB) -> Iterator[tuple[str, str, Optional[int], Optional[TimeInterval], Optional[int], Optional[TimeInterval]]]:
+    """ The (company name, room name, interview length, interview interval, coffee chat capacity, coffee chat interval)
+        of each room, in the order the rooms were added
+
+        One query with the interview and coffee chat of the room joined, None for those the room doesn't have.
+    """
+
+    col = lambda table, c: f'{table.name}.{c.name}'
+    rows = cursor.Iterate(f"""
+        SELECT {', '.join((
+            col(COMPANYROOM_TABLE, COMPANY_COMPANYNAME_COL),
+            col(COMPANYROOM_TABLE, COMPANYROOM_ROOMNAME_COL),
+            col(ROOMINTERVIEW_TABLE, ROOMINTERVIEW_LENGTH_COL),
+            col(ROOMINTERVIEW_TABLE, ROOMINTERVIEW_START_COL),
+            col(ROOMINTERVIEW_TABLE, ROOMINTERVIEW_END_COL),
+            col(COFFEECHAT_TABLE, COFFEECHAT_CAPACITY_COL),
+            col(COFFEECHAT_TABLE, COFFEECHAT_START_COL),
+            col(COFFEECHAT_TABLE, COFFEECHAT_END_COL)
+        ))}
+        FROM {COMPANYROOM_TABLE.name}
+        LEFT JOIN {ROOMINTERVIEW_TABLE.name} USING ({COMPANYROOM_ROOMNAME_COL.name})
+        LEFT JOIN {COFFEECHAT_TABLE.name} USING ({COMPANYROOM_ROOMNAME_COL.name})
+        ORDER BY {COMPANYROOM_TABLE.name}.rowid
+    """)
+    for companyName, roomName, length, start, end, capacity, ccStart, ccEnd in rows:
+        yield (
+            companyName,
+            roomName,
+            length,
+            getInterval(start, end) if start is not None else None,
+            capacity,
+            getInterval(ccStart, ccEnd) if ccStart is not None else None
+        )
+
 
 ATTENDEES_TABLE = createTable("attendee")
 ATTENDEES_ID_COL = ATTENDEES_TABLE.CreateColumn("attendeeID", INTEGER_TYPE, isPrimary=True)
 ATTENDEES_NAME_COL = ATTENDEES_TABLE.CreateColumn("attendeeName", VarCharType(50))
 
-def AddAttendee(cursor: SqliteDB, attendeeId: str, name: str):
-    cursor.InsertIntoTable(
-        ATTENDEES_TABLE, {
-            ATTENDEES_ID_COL: [attendeeId],
-            ATTENDEES_NAME_COL: [name]
-        }
-    )
+def AddAttendees(cursor: SqliteDB, attendees: list[tuple[str, str]]):
+    """ Add the (attendee id, name) attendees """
+
+    cursor.InsertMany(ATTENDEES_TABLE, [ATTENDEES_ID_COL, ATTENDEES_NAME_COL], attendees)
 
 def GetAttendees(cursor: SqliteDB) -> set[str]:
     return set((
@@ -220,102 +249,92 @@ def GetAttendees(cursor: SqliteDB) -> set[str]:
         ))
     ))
     
-def GetAttendeeNames(cursor: SqliteDB) -> dict[str, str]:
-    return {
-        c[ATTENDEES_ID_COL.name]:c[ATTENDEES_NAME_COL.name] 
-        for c in cursor.FetchAll(cursor.Q(
-            [ATTENDEES_ID_COL, ATTENDEES_NAME_COL],
-            ATTENDEES_TABLE,
-            orderBys=[ATTENDEES_ID_COL]
-        ))
-    }
+def GetAttendeeNames(cursor: SqliteDB) -> dict[int, str]:
+    return dict(cursor.Iterate(cursor.Q(
+        [ATTENDEES_ID_COL, ATTENDEES_NAME_COL],
+        ATTENDEES_TABLE,
+        orderBys=[ATTENDEES_ID_COL]
+    )))
 
 ATTENDEEBREAKS_TABLE = createTable("attendeeBreak")
 ATTENDEEBREAKS_TABLE.CreateForeignKey(ATTENDEES_ID_COL, isPrimary=True)
 ATTENDEEBREAKS_START_COL = ATTENDEEBREAKS_TABLE.CreateColumn("start", DATETIME_TYPE, isPrimary=True)
 ATTENDEEBREAKS_END_COL = ATTENDEEBREAKS_TABLE.CreateColumn("end", DATETIME_TYPE)
 
-def AddAttendeeBreak(cursor: SqliteDB, attendeeId: str, timeInt: TimeInterval):
-    cursor.InsertIntoTable(
-        ATTENDEEBREAKS_TABLE, {
-            ATTENDEES_ID_COL: [attendeeId],
-            ATTENDEEBREAKS_START_COL: [timeInt.time],
-            ATTENDEEBREAKS_END_COL: [timeInt.end]
-        }
+def AddAttendeeBreaks(cursor: SqliteDB, attendeeBreaks: list[tuple[int, TimeInterval]]):
+    cursor.InsertMany(
+        ATTENDEEBREAKS_TABLE,
+        [ATTENDEES_ID_COL, ATTENDEEBREAKS_START_COL, ATTENDEEBREAKS_END_COL],
+        [(attendeeId, timeInt.getStartDatetime(), timeInt.getEndDatetime()) for attendeeId, timeInt in attendeeBreaks]
     )
 
-def GetAttendeeBreaks(cursor: SqliteDB) -> dict[str, list[TimeInterval]]:
-    attendeeBreaksObj = cursor.FetchAll(cursor.Q(
+def GetAttendeeBreaks(cursor: SqliteDB) -> dict[int, list[TimeInterval]]:
+    attendeeBreaks = {}
+    for attId, start, end in cursor.Iterate(cursor.Q(
         [ATTENDEES_ID_COL, ATTENDEEBREAKS_START_COL, ATTENDEEBREAKS_END_COL],
         ATTENDEEBREAKS_TABLE
-    ))
-
-    attendeeBreaks = {}
-    for attendeeBreakObj in attendeeBreaksObj:
-        name = attendeeBreakObj[ATTENDEES_ID_COL.name]
-
-        getTime = lambda col: datetime.fromisoformat(attendeeBreakObj[col.name])
-        start = getTime(ATTENDEEBREAKS_START_COL)
-        end = getTime(ATTENDEEBREAKS_END_COL)
-        interval = TimeInterval(start, end-start)
-
-        attendeeBreaks[name] = attendeeBreaks.get(name, []) + [interval]
+    )):
+        attendeeBreaks.setdefault(attId, []).append(getInterval(start, end))
     return attendeeBreaks
 
 ATTENDEEPREFS_TABLE = createTable("attendeePreference")
 ATTENDEEPREFS_TABLE.CreateForeignKey(ATTENDEES_ID_COL, isPrimary=True)
 ATTENDEEPREFS_TABLE.CreateForeignKey(COMPANY_COMPANYNAME_COL, isPrimary=True)
 ATTENDEEBREAKS_PREF_COL = ATTENDEEPREFS_TABLE.CreateColumn("preference", INTEGER_TYPE)
+ATTENDEEPREFS_TABLE.CreateIndex([COMPANY_COMPANYNAME_COL]) # the primary key covers the lookups by attendee
 
-def AddAttendeePref(cursor: SqliteDB, attendeeId: str, companyName: str, pref: str):
-    cursor.InsertIntoTable(
-        ATTENDEEPREFS_TABLE, {
-            ATTENDEES_ID_COL: [attendeeId],
-            COMPANY_COMPANYNAME_COL: [companyName],
-            ATTENDEEBREAKS_PREF_COL: [pref]
-        }
+def AddAttendeePrefs(cursor: SqliteDB, attendeePrefs: list[tuple[int, str, int]]):
+    """ Add the (attendee id, company name, preference) preferences """
+
+    cursor.InsertMany(
+        ATTENDEEPREFS_TABLE,
+        [ATTENDEES_ID_COL, COMPANY_COMPANYNAME_COL, ATTENDEEBREAKS_PREF_COL],
+        attendeePrefs
     )
 
-def GetAttendeePrefs(cursor: SqliteDB) -> dict[str, dict[str, int]]:
-    attsPrefsObj = cursor.FetchAll(cursor.Q(
+def GetAttendeePrefs(cursor: SqliteDB) -> dict[int, dict[str, int]]:
+    attsPrefs = {}
+    for att, company, pref in cursor.Iterate(cursor.Q(
         [ATTENDEES_ID_COL, COMPANY_COMPANYNAME_COL, ATTENDEEBREAKS_PREF_COL],
         ATTENDEEPREFS_TABLE
-    ))
-    
-    attsPrefs = {}
-    for attPrefObj in attsPrefsObj:
-        att = attPrefObj[ATTENDEES_ID_COL.name]
-        company = attPrefObj[COMPANY_COMPANYNAME_COL.name]
-        pref = attPrefObj[ATTENDEEBREAKS_PREF_COL.name]
-        attPref = attsPrefs.get(att, {})
-        attPref[company] = pref
-        attsPrefs[att] = attPref
+    )):
+        attsPrefs.setdefault(att, {})[company] = pref
     return attsPrefs
 
+# the preference of the companies an attendee didn't rank, set by each prefs import
+ATTENDEEPREFDEFAULT_TABLE = createTable("attendeePreferenceDefault")
+ATTENDEEPREFDEFAULT_PREF_COL = ATTENDEEPREFDEFAULT_TABLE.CreateColumn("preference", INTEGER_TYPE, isPrimary=True)
+
+def SetDefaultAttendeePref(cursor: SqliteDB, pref: int):
+    cursor.EmptyTable(ATTENDEEPREFDEFAULT_TABLE)
+    cursor.InsertIntoTable(ATTENDEEPREFDEFAULT_TABLE, {ATTENDEEPREFDEFAULT_PREF_COL: [pref]})
+
+def GetDefaultAttendeePref(cursor: SqliteDB) -> Optional[int]:
+    """ The default preference, None if preferences were never imported """
+
+    prefObj = cursor.Fetch(cursor.Q([ATTENDEEPREFDEFAULT_PREF_COL], ATTENDEEPREFDEFAULT_TABLE))
+    return None if prefObj is None else prefObj[ATTENDEEPREFDEFAULT_PREF_COL.name]
+
 INTERVIEWCANDIDATES_TABLE = createTable("interviewCandidate")
 INTERVIEWCANDIDATES_TABLE.CreateForeignKey(COMPANYROOM_ROOMNAME_COL, isPrimary=True)
 INTERVIEWCANDIDATES_TABLE.CreateForeignKey(ATTENDEES_ID_COL, isPrimary=True)
+INTERVIEWCANDIDATES_TABLE.CreateIndex([ATTENDEES_ID_COL]) # the primary key covers the lookups by room
 
-def AddInterviewCandidate(cursor: SqliteDB, roomName: str, attendeeId: str):
-    cursor.InsertIntoTable(
-        INTERVIEWCANDIDATES_TABLE, {
-            COMPANYROOM_ROOMNAME_COL: [roomName],
-            ATTENDEES_ID_COL: [attendeeId]
-        }
-    )
+def AddInterviewCandidates(cursor: SqliteDB, candidates: list[tuple[str, int]]):
+    """ Add the (room name, attendee id) candidates """
 
-def GetInterviewCandidates(cursor: SqliteDB) -> dict[str, set[str]]:
-    roomCandidatesObj = cursor.FetchAll(cursor.Q(
-        [COMPANYROOM_ROOMNAME_COL, ATTENDEES_ID_COL],
-        INTERVIEWCANDIDATES_TABLE
-    ))
+    cursor.InsertMany(INTERVIEWCANDIDATES_TABLE, [COMPANYROOM_ROOMNAME_COL, ATTENDEES_ID_COL], candidates)
 
-    roomCandidates = {}
-    for roomCandidateObj in roomCandidatesObj:
-        room = roomCandidateObj[COMPANYROOM_ROOMNAME_COL.name]
-        att = roomCandidateObj[ATTENDEES_ID_COL.name]
+def GetInterviewCandidates(cursor: SqliteDB) -> dict[str, list[int]]:
+    """ The candidates of each room in the order they were imported, unique as (room, attendee) is the key """
 
-        roomCandidates[room] = roomCandidates.get(room, set()).union([att])
+    roomCandidates = {}
+    for room, att in cursor.Iterate(f"""
+        SELECT {COMPANYROOM_ROOMNAME_COL.name}, {ATTENDEES_ID_COL.name}
+        FROM {INTERVIEWCANDIDATES_TABLE.name}
+        ORDER BY rowid
+    """):
+        roomCandidates.setdefault(room, []).append(att)
     return roomCandidates
 
 
@@ -324,30 +343,109 @@ COFFEECHATCANDIDATES_TABLE = createTable("coffeeChatCandidate")
 COFFEECHATCANDIDATES_TABLE.CreateForeignKey(COMPANYROOM_ROOMNAME_COL, isPrimary=True)
 COFFEECHATCANDIDATES_TABLE.CreateForeignKey(ATTENDEES_ID_COL, isPrimary=True)
 COFFEECHATCANDIDATES_PREF_COL = COFFEECHATCANDIDATES_TABLE.CreateColumn("preference", INTEGER_TYPE)
-def AddCoffeeChatCandidate(cursor: SqliteDB, roomName: str, attId: int, pref: int):
-    cursor.InsertIntoTable(
-        COFFEECHATCANDIDATES_TABLE, {
-            COMPANYROOM_ROOMNAME_COL: [roomName],
-            ATTENDEES_ID_COL: [attId],
-            COFFEECHATCANDIDATES_PREF_COL: [pref]
-        }
+COFFEECHATCANDIDATES_TABLE.CreateIndex([ATTENDEES_ID_COL])
+def AddCoffeeChatCandidates(cursor: SqliteDB, candidates: list[tuple[str, int, int]]):
+    """ Add the (room name, attendee id, preference) candidates """
+
+    cursor.InsertMany(
+        COFFEECHATCANDIDATES_TABLE,
+        [COMPANYROOM_ROOMNAME_COL, ATTENDEES_ID_COL, COFFEECHATCANDIDATES_PREF_COL],
+        candidates
     )
 
 def GetCoffeeChatCandidates(cursor: SqliteDB) -> dict[str, list[int]]:
-    ccCandidatesObj = cursor.FetchAll(cursor.Q(
+    ccCandidates = {}
+    for room, att in cursor.Iterate(cursor.Q(
         [COMPANYROOM_ROOMNAME_COL, ATTENDEES_ID_COL],
         COFFEECHATCANDIDATES_TABLE,
         orderBys=[COFFEECHATCANDIDATES_PREF_COL]
+    )):
+        # because we orderby pref, we can just append and know we will be in order
+        ccCandidates.setdefault(room, []).append(att)
+    return ccCandidates
+
+
+# schedule sessions, a schedule at some version and the swaps made since then
+SCHEDULESESSION_TABLE = createTable("scheduleSession")
+SCHEDULESESSION_ID_COL = SCHEDULESESSION_TABLE.CreateColumn("sessionID", VarCharType(32), isPrimary=True)
+SCHEDULESESSION_VERSION_COL = SCHEDULESESSION_TABLE.CreateColumn("version", INTEGER_TYPE)
+SCHEDULESESSION_SCHEDULE_COL = SCHEDULESESSION_TABLE.CreateColumn("schedule", TEXT_TYPE)
+
+SCHEDULESESSIONSWAP_TABLE = createTable("scheduleSessionSwap")
+SCHEDULESESSIONSWAP_TABLE.CreateForeignKey(SCHEDULESESSION_ID_COL, isPrimary=True)
+SCHEDULESESSIONSWAP_VERSION_COL = SCHEDULESESSIONSWAP_TABLE.CreateColumn("version", INTEGER_TYPE, isPrimary=True)
+SCHEDULESESSIONSWAP_SWAP_COL = SCHEDULESESSIONSWAP_TABLE.CreateColumn("swap", TEXT_TYPE)
+
+def AddScheduleSession(cursor: SqliteDB, sessionId: str, version: int, schedule: str):
+    cursor.InsertIntoTable(
+        SCHEDULESESSION_TABLE, {
+            SCHEDULESESSION_ID_COL: [sessionId],
+            SCHEDULESESSION_VERSION_COL: [version],
+            SCHEDULESESSION_SCHEDULE_COL: [schedule]
+        }
+    )
+
+def AddScheduleSessionSwap(cursor: SqliteDB, sessionId: str, version: int, swap: str):
+    cursor.InsertIntoTable(
+        SCHEDULESESSIONSWAP_TABLE, {
+            SCHEDULESESSION_ID_COL: [sessionId],
+            SCHEDULESESSIONSWAP_VERSION_COL: [version],
+            SCHEDULESESSIONSWAP_SWAP_COL: [swap]
+        }
+    )
+
+def RemoveScheduleSession(cursor: SqliteDB, sessionId: str):
+    """ Remove the session and its swaps """
+
+    cursor.Execute(f"""
+        DELETE FROM {SCHEDULESESSION_TABLE.name}
+        WHERE {SCHEDULESESSION_ID_COL.name} = {SCHEDULESESSION_ID_COL.dataType.Format(sessionId)}
+    """)
+
+def RemoveOldScheduleSessions(cursor: SqliteDB, maxSessions: int, keepIds: Iterable[str] = ()):
+    """ Keep the $maxSessions most recently written sessions and the sessions of $keepIds """
+
+    keepIdsStr = ', '.join((SCHEDULESESSION_ID_COL.dataType.Format(sessionId) for sessionId in keepIds))
+    cursor.Execute(f"""
+        DELETE FROM {SCHEDULESESSION_TABLE.name}
+        WHERE {SCHEDULESESSION_ID_COL.name} NOT IN (
+            SELECT {SCHEDULESESSION_ID_COL.name}
+            FROM {SCHEDULESESSION_TABLE.name}
+            ORDER BY {SCHEDULESESSION_TABLE.timestampCol.name} DESC
+            LIMIT {int(maxSessions)}
+        ) AND {SCHEDULESESSION_ID_COL.name} NOT IN ({keepIdsStr})
+    """)
+
+def ScheduleSessionExists(cursor: SqliteDB, sessionId: str) -> bool:
+    return cursor.Exists(cursor.Q(
+        [SCHEDULESESSION_ID_COL],
+        SCHEDULESESSION_TABLE,
+        {SCHEDULESESSION_ID_COL: sessionId}
     ))
 
-    ccCandidates = {}
-    for roomCandidateObj in ccCandidatesObj:
-        room = roomCandidateObj[COMPANYROOM_ROOMNAME_COL.name]
-        att = roomCandidateObj[ATTENDEES_ID_COL.name]
+def GetScheduleSession(cursor: SqliteDB, sessionId: str) -> Optional[tuple[int, str, list[str]]]:
+    """ (version, schedule, swaps made since the schedule in order), None if there is no such session """
 
-        ccCandidates[room] = ccCandidates.get(room, []) + [att]
-        # because we orderby pref, we can just append and know we will be in order
-    return ccCandidates
+    sessionObj = cursor.Fetch(cursor.Q(
+        [SCHEDULESESSION_VERSION_COL, SCHEDULESESSION_SCHEDULE_COL],
+        SCHEDULESESSION_TABLE,
+        {SCHEDULESESSION_ID_COL: sessionId}
+    ))
+    if sessionObj is None:
+        return None
+
+    version = sessionObj[SCHEDULESESSION_VERSION_COL.name]
+    swaps = [
+        swapObj[SCHEDULESESSIONSWAP_SWAP_COL.name]
+        for swapObj in cursor.FetchAll(cursor.Q(
+            [SCHEDULESESSIONSWAP_VERSION_COL, SCHEDULESESSIONSWAP_SWAP_COL],
+            SCHEDULESESSIONSWAP_TABLE,
+            {SCHEDULESESSION_ID_COL: sessionId},
+            orderBys=[SCHEDULESESSIONSWAP_VERSION_COL]
+        ))
+        if swapObj[SCHEDULESESSIONSWAP_VERSION_COL.name] > version
+    ]
+    return version, sessionObj[SCHEDULESESSION_SCHEDULE_COL.name], swaps
 
 def clearAllTables(cursor: SqliteDB): 
     for table in TABLES:
@@ -6,7 +6,8 @@ newLineTab = newLine + tab #can't use backslashes in f strings
 singleQuote = "'"
 from os import system
 from datetime import datetime
-from typing import Callable, Optional, Any
+from threading import Lock
+from typing import Callable, Iterable, Iterator, Optional, Any
 
 DB_FILENAME = "database.db" # !!!!! REPLACE !!!!!
 
@@ -20,11 +21,13 @@ class DataType:
         self, 
         sqliteName: str, 
         formatFunc: Callable = lambda v: str(v),
-        enum: tuple = []
+        enum: tuple = [],
+        bindFunc: Optional[Callable] = None
     ):
         self.sqliteName = sqliteName
-        self.formatFunc = formatFunc
+        self.formatFunc = formatFunc # value -> sql literal
         self.enum = enum
+        self.bindFunc = bindFunc # value -> bound parameter, None if sqlite3 can bind the value itself
 
     def Format(self, value: Any):
         return self.formatFunc(value)
@@ -45,7 +48,8 @@ BOOL_TYPE = DataType(
     lambda b: str(int(b)), 
     (0, 1)
 )
-DATETIME_TYPE = DataType("DATETIME", lambda dt: f"'{dt.isoformat()}'")
+DATETIME_TYPE = DataType("DATETIME", lambda dt: f"'{dt.isoformat()}'", bindFunc=lambda dt: dt.isoformat())
+TEXT_TYPE = DataType("TEXT", lambda v: f"'{str(v).replace(singleQuote, singleQuote*2)}'")
 
 class Column:
 
@@ -79,11 +83,24 @@ class Column:
         if self.foreignKey is None: raise ValueError("foreignKey is None")
         return f'FOREIGN KEY ({self.name}) REFERENCES {self.foreignKey.table.name}({self.foreignKey.name}) ON DELETE CASCADE'
 
+class Index:
+    """ An index on $columns of $table, for the lookups and the ON DELETE CASCADEs the primary key doesn't cover """
+
+    def __init__(self, table: 'Table', columns: list[Column], unique: bool = False):
+        self.table = table
+        self.columns = columns
+        self.unique = unique
+        self.name = f"{table.name}_{'_'.join((c.name for c in columns))}_index"
+
+    def __repr__(self) -> str:
+        return f"""CREATE {"UNIQUE " if self.unique else ""}INDEX IF NOT EXISTS {self.name} ON {self.table.name}({', '.join((c.name for c in self.columns))});"""
+
 class Table:
 
     def __init__(self, name: str):
         self.name = name
         self.columns = []
+        self.indexes: list[Index] = []
 
     def AddColumn(self, column: Column) -> Column:
         self.columns.append(column)
@@ -103,7 +120,14 @@ class Table:
             
         rowStrs.extend([col.GetForeignKeyStr() for col in self.columns if col.foreignKey != None])
             
-        return f"""CREATE TABLE IF NOT EXISTS {self.name}({','.join([(newLineTab + s) for s in rowStrs])}{newLine});"""
+        createStr = f"""CREATE TABLE IF NOT EXISTS {self.name}({','.join([(newLineTab + s) for s in rowStrs])}{newLine});"""
+        return newLine.join([createStr] + [str(index) for index in self.indexes])
+
+    def CreateIndex(self, cols: list[Column], unique: bool = False) -> Index:
+        self.CheckColumns(cols)
+        index = Index(self, cols, unique)
+        self.indexes.append(index)
+        return index
 
     def CheckColumns(self, cols: list[Column]):
         if not set(cols).issubset([c.Source() for c in self.columns]): 
@@ -130,6 +154,27 @@ class Table:
             
         return insertStr.strip(",")
 
+    def GetInsertManyStr(self, columns: list[Column]) -> str:
+        """ Insert statement with a bound parameter per column """
+
+        self.CheckColumns(columns)
+        return f'INSERT INTO {self.name}({", ".join((c.name for c in columns))}) VALUES ({", ".join(["?"] * len(columns))})'
+
+    def GetInsertManyParams(self, columns: list[Column], rows: Iterable[tuple]) -> list[tuple]:
+        """ The bound parameters of GetInsertManyStr for each row of $rows, in the order of $columns """
+
+        binds = [(i, c.dataType.bindFunc) for i, c in enumerate(columns) if c.dataType.bindFunc is not None]
+        if not binds:
+            return [tuple(row) for row in rows]
+
+        params = []
+        for row in rows:
+            row = list(row)
+            for i, bind in binds:
+                row[i] = bind(row[i])
+            params.append(tuple(row))
+        return params
+
     def CreateColumn(
         self,
         name: str, 
@@ -167,16 +212,84 @@ class DatedTable(Table):
         columnValues[self.timestampCol] = [self.GetTimestamp()] * numEntries
         return super().GetInsertStr(columnValues)
 
+    #@override
+    def GetInsertManyStr(self, columns: list[Column]) -> str:
+        return super().GetInsertManyStr(columns + [self.timestampCol])
+
+    #@override
+    def GetInsertManyParams(self, columns: list[Column], rows: Iterable[tuple]) -> list[tuple]:
+        timestamp = self.GetTimestamp()
+        return [params + (timestamp,) for params in super().GetInsertManyParams(columns, rows)]
+
+def Connect(dbName: Optional[str] = None, pragmas: tuple[str, ...] = (), checkSameThread: bool = True) -> sqlite3.Connection:
+    connection = sqlite3.connect(dbName or DB_FILENAME, check_same_thread=checkSameThread)
+    connection.execute("PRAGMA foreign_keys = 1")
+    for pragma in pragmas:
+        connection.execute(f"PRAGMA {pragma}")
+    connection.isolation_level = None
+    connection.row_factory = sqlite3.Row
+    return connection
+
+class SqliteConnectionPool:
+    """ Reusable connections to $dbName in WAL mode, and the lock of its single writer
+
+        With WAL, readers don't block the writer and the writer doesn't block readers.
+        Write transactions take $writeLock, so they wait for each other instead of
+        failing with 'database is locked'.
+    """
+
+    PRAGMAS = (
+        "journal_mode = WAL",
+        "synchronous = NORMAL", # durable at checkpoints, WAL keeps the database consistent
+        "cache_size = -16384", # KiB
+        "mmap_size = 268435456", # bytes
+        "busy_timeout = 5000" # ms, for writers in other processes
+    )
+
+    def __init__(self, dbName: Optional[str] = None, maxIdle: int = 8):
+        self.dbName = dbName
+        self.maxIdle = maxIdle
+        self.idle: list[sqlite3.Connection] = []
+        self.lock = Lock()
+        self.writeLock = Lock()
+
+    def Acquire(self) -> sqlite3.Connection:
+        with self.lock:
+            if self.idle:
+                return self.idle.pop()
+        # connections move between the threads of the server, one thread at a time
+        return Connect(self.dbName, self.PRAGMAS, checkSameThread=False)
+
+    def Release(self, connection: sqlite3.Connection):
+        with self.lock:
+            if len(self.idle) < self.maxIdle:
+                self.idle.append(connection)
+                return
+        connection.close()
+
+    def Cursor(self, readOnly: bool = False) -> SqliteDB:
+        """ A transaction on a pooled connection, read only transactions don't take the write lock """
+
+        return SqliteDB(pool=self, readOnly=readOnly)
+
 class SqliteDB():
     
-    def __init__(self, dbName = None):
-        self.connection = sqlite3.connect(dbName or DB_FILENAME)
-        self.connection.execute("PRAGMA foreign_keys = 1")
-        self.connection.isolation_level = None
-        self.connection.row_factory = sqlite3.Row
+    def __init__(self, dbName = None, pool: Optional[SqliteConnectionPool] = None, readOnly: bool = False):
+        self.pool = pool
+        self.readOnly = readOnly
+        self.writeLock = pool.writeLock if pool is not None and not readOnly else None
+        self.connection = pool.Acquire() if pool is not None else Connect(dbName)
         self.cursor = self.connection.cursor()
         self.lastQuery = ""
-        self.Execute("BEGIN")
+        if self.writeLock is not None:
+            self.writeLock.acquire()
+        try:
+            if readOnly:
+                self.Execute("PRAGMA query_only = 1")
+            self.Execute("BEGIN IMMEDIATE" if self.writeLock is not None else "BEGIN")
+        except:
+            self.Close()
+            raise
         
     def __enter__(self):
         return self
@@ -188,6 +301,19 @@ class SqliteDB():
     def InsertIntoTable(self, table: Table, columnValues: dict[Column, list]):
         self.Execute(table.GetInsertStr(columnValues))
 
+    def InsertMany(self, table: Table, columns: list[Column], rows: Iterable[tuple]):
+        """ Insert $rows, tuples of values in the order of $columns, with one executemany
+
+            The statement is compiled once (and kept in sqlite3's statement cache)
+            and the values are bound, not formatted into the sql.
+        """
+
+        params = table.GetInsertManyParams(columns, rows)
+        if not params:
+            return
+        self.lastQuery = table.GetInsertManyStr(columns)
+        self.cursor.executemany(self.lastQuery, params)
+
     @staticmethod
     def Q(columns: list[Column], table: Table, columnValues: dict[Column, Any] = {}, orderBys: list[Column] = []):
         table.CheckColumns(set(columns) | set(columnValues.keys()))
@@ -217,19 +343,53 @@ class SqliteDB():
         self.Execute(query)
         return [dict(r) for r in self.cursor.fetchall()]
 
+    def Iterate(self, query: str) -> Iterator[tuple]:
+        """ The rows of $query as tuples, streamed from a cursor of their own instead of fetched as dicts """
+
+        cursor = self.connection.cursor()
+        cursor.row_factory = None
+        self.lastQuery = query
+        yield from cursor.execute(query)
+
     def Exists(self, query: str) -> bool:
         return self.Fetch(query) is not None
     
     def EmptyTable(self, table: Table):
         self.Execute(f'DELETE FROM {table.name}')
 
+    def Commit(self):
+        """ Commit the transaction so far and begin the next one """
+
+        self.connection.commit()
+        self.Execute("BEGIN IMMEDIATE" if self.writeLock is not None else "BEGIN")
+
     def Rollback(self):
         self.Execute("ROLLBACK")
         self.connection.rollback()
 
+    def Close(self):
+        """ End the transaction, give the connection back to the pool (or close it) """
+
+        try:
+            if self.connection.in_transaction:
+                self.connection.rollback()
+            if self.readOnly:
+                self.connection.execute("PRAGMA query_only = 0")
+        finally:
+            if self.writeLock is not None:
+                self.writeLock.release()
+                self.writeLock = None
+            if self.pool is not None:
+                self.pool.Release(self.connection)
+            else:
+                self.connection.close()
+
     def __exit__(self, type, value, traceback):
-        self.connection.commit()
-        self.connection.close()
+        try:
+            if type is None:
+                self.connection.commit()
+        finally:
+            self.Close()
     
     @staticmethod
     def FormatValue(value: Any):
@@ -0,0 +1,100 @@
+from __future__ import annotations
+import sqlite3
+import tracemalloc
+from time import perf_counter
+from contextlib import redirect_stdout
+from io import StringIO
+from os import path
+from tempfile import TemporaryDirectory
+from typing import Callable, Any
+
+from SqliteLib import SqliteDB
+from Schema import GetConventionTimes
+from parseTable import getFileContents, setAttendeeAndCompanies
+from parseSchedule import parseJsonSchedule
+from interviewSchedulerFromInput import DEBUGGING_TABLE_FILES, minRank, run
+from serverUtilities import AppointmentIntersects
+
+# benchmarks against the bundled csv files, run with `python3 benchmark.py`
+
+def createDebuggingDB(dbName: str):
+    """ Create a database at $dbName, filled with the bundled csv files """
+
+    connection = sqlite3.connect(dbName)
+    with open('schema.sql', 'r') as f:
+        connection.executescript(f.read())
+    connection.close()
+
+    with SqliteDB(dbName) as cursor:
+        for func, filename in DEBUGGING_TABLE_FILES:
+            func(getFileContents(filename), cursor)
+
+def measureMemory(func: Callable[[], Any]) -> tuple[Any, int]:
+    """ Return the result of $func and the bytes it still holds on to """
+
+    tracemalloc.start()
+    try:
+        ret = func()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return ret, size
+
+def loadModel(dbName: str):
+    companies, attendees = [], []
+    with SqliteDB(dbName) as cursor:
+        setAttendeeAndCompanies(cursor, companies, attendees)
+        conventionTimes = GetConventionTimes(cursor)
+    return companies, attendees, conventionTimes
+
+def benchmarkMemory(dbName: str):
+    (companies, attendees, conventionTimes), modelSize = measureMemory(lambda: loadModel(dbName))
+
+    with redirect_stdout(StringIO()):
+        schedule = run(companies, attendees, conventionTimes)
+    _, scheduleSize = measureMemory(lambda: parseJsonSchedule(schedule))
+
+    noApps = sum(len(c.getAppointments()) for c in companies)
+    print(f'memory ({len(attendees)} attendees, {len(companies)} companies, {noApps} appointments):')
+    print(f'\tsetAttendeeAndCompanies: {modelSize / 1024:.0f} KiB')
+    print(f'\tparseJsonSchedule: {scheduleSize / 1024:.0f} KiB')
+
+def benchmarkMinRank(dbName: str):
+    """ Time minRank filling an empty schedule, which makes it do a lot of swaps """
+
+    print('minRank from an empty schedule:')
+    for bestImprovement in (False, True):
+        companies, _, _ = loadModel(dbName)
+        appIntersects = AppointmentIntersects(companies)
+
+        start = perf_counter()
+        minRank(companies, appIntersects, False, bestImprovement)
+        minRank(companies, appIntersects, True, bestImprovement)
+        duration = perf_counter() - start
+
+        metrics = appIntersects.metrics
+        mode = 'best improvement' if bestImprovement else 'first improvement'
+        print(f'\t{mode}: {duration:.2f}s, utility {metrics.utility}, {metrics.noAppsNotEmpty} appointments filled')
+
+def benchmarkAnneal(dbName: str, iterations: int = 1000000):
+    """ Print cost against iterations of the anneal phases """
+
+    companies, attendees, conventionTimes = loadModel(dbName)
+    with redirect_stdout(StringIO()):
+        schedule = run(companies, attendees, conventionTimes, annealIterations=iterations)
+
+    for phase in schedule['phases']:
+        if 'trace' not in phase:
+            continue
+        print(f"{phase['name']} ({iterations} iterations, {phase['seconds']:.2f}s):")
+        for point in phase['trace'][::10]:
+            print(f"\t{point['iteration']}: cost {point['cost']:.2f}, best {point['bestCost']:.2f}")
+    print(f"totalUtility {schedule['totalUtility']}, {schedule['noAppointmentsNotEmpty']} appointments filled")
+
+if __name__ == "__main__":
+    with TemporaryDirectory() as tempDir:
+        dbName = path.join(tempDir, 'benchmark.db')
+        createDebuggingDB(dbName)
+        benchmarkMemory(dbName)
+        benchmarkMinRank(dbName)
+        benchmarkAnneal(dbName)
@@ -0,0 +1,240 @@
+from __future__ import annotations
+from datetime import datetime
+from typing import Any, Optional
+
+from serverUtilities import (
+    NO_PREF,
+    Attendee,
+    Company,
+    CompanyPreference,
+    ScheduleMetrics,
+    TimeInterval,
+    ValidationException,
+    fromMinutes,
+    getJsonMetrics,
+    toMinutes,
+)
+
+COMPACT_FORMAT = 'compact'
+
+def getCompactSchedule(
+        companies: list[Company],
+        attendees: list[Attendee],
+        conventionTimes: list[TimeInterval],
+        metrics: Optional[ScheduleMetrics] = None
+    ) -> dict:
+    """ getJsonSchedule as a columnar table per kind of object
+
+        Companies, rooms and attendees are referred to by their index in their table,
+        times are minutes since $origin and apps are parallel arrays.
+    """
+
+    origin = min((t.time for t in conventionTimes), default=0)
+    attToIndex = {att: i for i, att in enumerate(attendees)}
+    getAttIndex = lambda att: attToIndex[att] if att is not None else None
+
+    companyToIndex = {c: i for i, c in enumerate(companies)}
+    rooms = [room for c in companies for room in c.rooms]
+    roomToIndex = {room: i for i, room in enumerate(rooms)}
+    apps = [app for room in rooms for app in room.appointments]
+
+    def getCoffeeChat(room) -> Optional[dict]:
+        coffeeChat = room.coffeeChat
+        if coffeeChat is None:
+            return None
+        return {
+            'capacity': coffeeChat.capacity,
+            'start': coffeeChat.time - origin,
+            'end': coffeeChat.end - origin,
+            'candidates': [attToIndex[att] for att in coffeeChat.candidates]
+        }
+
+    return {
+        'format': COMPACT_FORMAT,
+        'origin': fromMinutes(origin).isoformat(),
+        'companies': [c.name for c in companies],
+        'rooms': {
+            'name': [room.name for room in rooms],
+            'company': [companyToIndex[room.company] for room in rooms],
+            'candidates': [[attToIndex[att] for att in room.candidates] for room in rooms],
+            'coffeeChat': [getCoffeeChat(room) for room in rooms]
+        },
+        'attendees': {
+            'id': [att.uid for att in attendees],
+            'name': [att.name for att in attendees],
+            'prefs': [ # None for the companies an attendee didn't rank
+                [
+                    att.prefs[c.ordinal] if c.ordinal < len(att.prefs) and att.prefs[c.ordinal] != NO_PREF else None
+                    for c in companies
+                ]
+                for att in attendees
+            ],
+            'defaultPref': [att.defaultPref if att.defaultPref != NO_PREF else None for att in attendees],
+            'commitments': [
+                [[commit.time - origin, commit.end - origin] for commit in att.commitments]
+                for att in attendees
+            ]
+        },
+        'apps': {
+            'room': [roomToIndex[app.companyRoom] for app in apps],
+            'start': [app.time - origin for app in apps],
+            'end': [app.end - origin for app in apps],
+            'isCoffeeChat': [int(app.isCoffeeChat()) for app in apps],
+            'att': [getAttIndex(app.attendee) for app in apps]
+        },
+        'conventionTimes': [[t.time - origin, t.end - origin] for t in conventionTimes],
+        **getJsonMetrics(metrics or ScheduleMetrics(companies))
+    }
+
+def isCompactSchedule(data: dict) -> bool:
+    return data.get('format', None) == COMPACT_FORMAT
+
+def throwIfInvalidCompactSchedule(data: dict):
+    """ Raise a ValidationException unless $data has the tables, columns and indices of a getCompactSchedule """
+
+    def throwIfNotTable(name: str, table: Any, columns: list[str]) -> int:
+        """ The number of rows of $table """
+
+        ValidationException.throwIfFalse(
+            isinstance(table, dict) and all(isinstance(table.get(col), list) for col in columns),
+            f'invalid compact schedule: {name} must have the columns {", ".join(columns)}'
+        )
+        noRows = len(table[columns[0]])
+        ValidationException.throwIfFalse(
+            all(len(table[col]) == noRows for col in columns),
+            f'invalid compact schedule: the columns of {name} must have the same length'
+        )
+        return noRows
+
+    def throwIfNotIndices(name: str, indices: Any, length: int, isNullable: bool = False):
+        ValidationException.throwIfFalse(
+            isinstance(indices, list) and all(
+                (i is None and isNullable) or (type(i) is int and 0 <= i < length) 
+                for i in indices
+            ),
+            f'invalid compact schedule: {name} must be indices below {length}'
+        )
+
+    def throwIfNotIntervals(name: str, intervals: Any):
+        ValidationException.throwIfFalse(
+            isinstance(intervals, list) and all(
+                isinstance(interval, list) and len(interval) == 2 
+                and all(type(t) is int for t in interval) and interval[0] < interval[1]
+                for interval in intervals
+            ),
+            f'invalid compact schedule: {name} must be [start, end] pairs of minutes with start < end'
+        )
+
+    ValidationException.throwIfFalse(
+        isinstance(data.get('origin'), str) and isinstance(data.get('companies'), list)
+            and isinstance(data.get('conventionTimes'), list),
+        'invalid compact schedule: it must have an origin, companies and conventionTimes'
+    )
+    noCompanies = len(data['companies'])
+    roomsJson, attendeesJson, appsJson = data.get('rooms'), data.get('attendees'), data.get('apps')
+    noRooms = throwIfNotTable('rooms', roomsJson, ['name', 'company', 'candidates', 'coffeeChat'])
+    noAttendees = throwIfNotTable('attendees', attendeesJson, ['id', 'name', 'prefs', 'defaultPref', 'commitments'])
+    throwIfNotTable('apps', appsJson, ['room', 'start', 'end', 'isCoffeeChat', 'att'])
+
+    throwIfNotIndices('rooms.company', roomsJson['company'], noCompanies)
+    for candidates in roomsJson['candidates']:
+        throwIfNotIndices('rooms.candidates', candidates, noAttendees)
+    for coffeeChatJson in roomsJson['coffeeChat']:
+        if coffeeChatJson is None:
+            continue
+        ValidationException.throwIfFalse(
+            isinstance(coffeeChatJson, dict) and all(key in coffeeChatJson for key in ('capacity', 'start', 'end', 'candidates')),
+            'invalid compact schedule: a coffeeChat must have a capacity, start, end and candidates'
+        )
+        ValidationException.throwIfFalse(
+            type(coffeeChatJson['capacity']) is int and coffeeChatJson['capacity'] >= 0, 
+            'invalid compact schedule: a coffeeChat capacity must be a non negative integer'
+        )
+        throwIfNotIntervals('rooms.coffeeChat', [[coffeeChatJson['start'], coffeeChatJson['end']]])
+        throwIfNotIndices('rooms.coffeeChat.candidates', coffeeChatJson['candidates'], noAttendees)
+
+    isPref = lambda pref: pref is None or type(pref) is int
+    ValidationException.throwIfFalse(
+        all(
+            isinstance(prefs, list) and len(prefs) == noCompanies and all(isPref(pref) for pref in prefs)
+            for prefs in attendeesJson['prefs']
+        ) and all(isPref(pref) for pref in attendeesJson['defaultPref']),
+        f'invalid compact schedule: attendees.prefs must have a preference (or null) for each of the {noCompanies} companies'
+    )
+    for commitments in attendeesJson['commitments']:
+        throwIfNotIntervals('attendees.commitments', commitments)
+
+    throwIfNotIndices('apps.room', appsJson['room'], noRooms)
+    throwIfNotIndices('apps.att', appsJson['att'], noAttendees, isNullable=True)
+    ValidationException.throwIfFalse(
+        all(isCoffeeChat in (0, 1) for isCoffeeChat in appsJson['isCoffeeChat']),
+        'invalid compact schedule: apps.isCoffeeChat must be 0 or 1'
+    )
+    throwIfNotIntervals('apps.start and apps.end', [list(interval) for interval in zip(appsJson['start'], appsJson['end'])])
+    throwIfNotIntervals('conventionTimes', data['conventionTimes'])
+
+def parseCompactSchedule(data: dict) -> tuple[
+        list[Company],
+        list[Attendee],
+        list[TimeInterval]
+    ]:
+    """ The model of a getCompactSchedule, raises a ValidationException if $data isn't one """
+
+    throwIfInvalidCompactSchedule(data)
+    try:
+        origin = toMinutes(datetime.fromisoformat(data['origin']))
+    except ValueError:
+        raise ValidationException(f'invalid compact schedule: origin ({data["origin"]}) must be an iso datetime')
+    getTime = lambda start, end: TimeInterval(origin + start, end - start)
+
+    companies = [Company(name, ordinal) for ordinal, name in enumerate(data['companies'])]
+
+    attendeesJson = data['attendees']
+    attendees = [
+        Attendee(
+            uid,
+            name,
+            [CompanyPreference(c, pref) for c, pref in zip(companies, prefs) if pref is not None],
+            [getTime(start, end) for start, end in commitments],
+            defaultPref if defaultPref is not None else NO_PREF
+        )
+        for uid, name, prefs, defaultPref, commitments in zip(
+            attendeesJson['id'], 
+            attendeesJson['name'], 
+            attendeesJson['prefs'], 
+            attendeesJson['defaultPref'], 
+            attendeesJson['commitments']
+        )
+    ]
+
+    roomsJson, appsJson = data['rooms'], data['apps']
+    roomApps = [[] for _ in roomsJson['name']] # the (app index, isCoffeeChat) of each room
+    for i, (roomIndex, isCoffeeChat) in enumerate(zip(appsJson['room'], appsJson['isCoffeeChat'])):
+        roomApps[roomIndex].append((i, bool(isCoffeeChat)))
+
+    for roomIndex, (name, companyIndex, candidates, coffeeChatJson) in enumerate(zip(
+        roomsJson['name'], roomsJson['company'], roomsJson['candidates'], roomsJson['coffeeChat']
+    )):
+        interviews = [i for i, isCoffeeChat in roomApps[roomIndex] if not isCoffeeChat]
+        room = companies[companyIndex].addCompanyRoom(
+            name,
+            [getTime(appsJson['start'][i], appsJson['end'][i]) for i in interviews],
+            [attendees[att] for att in candidates]
+        )
+        if coffeeChatJson is not None:
+            room.setCoffeeChat(
+                coffeeChatJson['capacity'],
+                getTime(coffeeChatJson['start'], coffeeChatJson['end']),
+                [attendees[att] for att in coffeeChatJson['candidates']]
+            )
+
+        # like parseJsonSchedule, the apps of each kind are in the order of the room's apps
+        coffeeChats = [i for i, isCoffeeChat in roomApps[roomIndex] if isCoffeeChat]
+        for isCoffeeChat, appIndices in ((False, interviews), (True, coffeeChats)):
+            for i, app in zip(appIndices, [a for a in room.appointments if a.isCoffeeChat() == isCoffeeChat]):
+                att = appsJson['att'][i]
+                if att is not None:
+                    app.setAttendee(attendees[att])
+
+    conventionTimes = [getTime(start, end) for start, end in data['conventionTimes']]
+    return companies, attendees, conventionTimes
@@ -0,0 +1,114 @@
+from __future__ import annotations
+import numpy as np
+
+from serverUtilities import Appointment, AppointmentIntersects, Attendee, Company
+
+class FeasibilityMatrix:
+    """ attendee x appointment matrix of whether app.canSwap(attendee, appIntersects, None),
+        for the apps of one kind (interview or coffee chat)
+
+        Combines candidacy, commitments, one app per company and overlapping apps.
+        It only follows the model through fill() and updateAttendee(),
+        call those after every change of an app's attendee.
+    """
+
+    def __init__(self, companies: list[Company], attendees: list[Attendee], appIntersects: AppointmentIntersects, isCoffeeChat: bool):
+        self.isCoffeeChat = isCoffeeChat
+        self.appIntersects = appIntersects
+        slotGrid = appIntersects.slotGrid
+
+        # columns are in the order of companies -> rooms -> appointments
+        self.apps: list[Appointment] = []
+        companyIndices, roomIndices = [], []
+        self.roomToIndex = {}
+        for companyIndex, c in enumerate(companies):
+            for room in c.rooms:
+                roomIndex = self.roomToIndex.setdefault(room, len(self.roomToIndex))
+                for app in room.appointments:
+                    if app.isCoffeeChat() == isCoffeeChat:
+                        self.apps.append(app)
+                        companyIndices.append(companyIndex)
+                        roomIndices.append(roomIndex)
+        self.appToIndex = {app: i for i, app in enumerate(self.apps)}
+        self.companies = companies
+        self.companyToIndex = {c: i for i, c in enumerate(companies)}
+
+        self.appCompany = np.array(companyIndices, dtype=np.intp)
+        self.appRoom = np.array(roomIndices, dtype=np.intp)
+        slotRanges = [slotGrid.getSlotRange(app) for app in self.apps]
+        self.appFirstSlot = np.array([first for first, _ in slotRanges], dtype=np.int64)
+        self.appLastSlot = np.array([last for _, last in slotRanges], dtype=np.int64)
+        self.isEmpty = np.array([app.isEmpty() for app in self.apps], dtype=bool)
+
+        self.attendees = attendees
+        self.attToIndex = {att: i for i, att in enumerate(attendees)}
+        self.matrix = np.zeros((len(attendees), len(self.apps)), dtype=bool)
+        for att in attendees:
+            self.updateAttendee(att)
+
+    def getOverlapping(self, first: int, last: int) -> np.ndarray:
+        """ mask of the apps intersecting the slots [$first, $last) """
+
+        if last <= first:
+            return np.zeros(len(self.apps), dtype=bool)
+        return (self.appFirstSlot < last) & (first < self.appLastSlot)
+
+    def getWantedRooms(self, att: Attendee) -> list[int]:
+        return [
+            roomIndex for room, roomIndex in self.roomToIndex.items()
+            if room.wantsAttendee(att, self.isCoffeeChat)
+        ]
+
+    def getCompaniesWant(self, att: Attendee) -> np.ndarray:
+        """ mask of the apps whose company wants $att """
+
+        companiesWant = [
+            i for i, c in enumerate(self.companies)
+            if c.wantsAttendee(att, self.isCoffeeChat)
+        ]
+        return np.isin(self.appCompany, companiesWant)
+
+    def updateAttendee(self, att: Attendee):
+        """ Recompute the row of $att from the model """
+
+        slotGrid = self.appIntersects.slotGrid
+        row = np.isin(self.appRoom, self.getWantedRooms(att)) & self.isEmpty
+
+        for commit in att.commitments:
+            row &= ~self.getOverlapping(*slotGrid.getSlotRange(commit))
+
+        for app in self.appIntersects.attToApps.get(att, ()):
+            row &= ~self.getOverlapping(*slotGrid.getSlotRange(app))
+            if app.isCoffeeChat() == self.isCoffeeChat:
+                row &= self.appCompany != self.companyToIndex[app.company]
+
+        self.matrix[self.attToIndex[att]] = row
+
+    def fill(self, app: Appointment, att: Attendee):
+        """ $app was given to $att """
+
+        appIndex = self.appToIndex[app]
+        self.isEmpty[appIndex] = False
+        self.matrix[:, appIndex] = False
+        self.matrix[self.attToIndex[att]] &= (
+            ~self.getOverlapping(self.appFirstSlot[appIndex], self.appLastSlot[appIndex])
+            & (self.appCompany != self.appCompany[appIndex])
+        )
+
+    def canSwap(self, att: Attendee, app: Appointment) -> bool:
+        return bool(self.matrix[self.attToIndex[att], self.appToIndex[app]])
+
+    def getValidApps(self, att: Attendee) -> list[Appointment]:
+        return [self.apps[i] for i in np.flatnonzero(self.matrix[self.attToIndex[att]])]
+
+    def hasBlockedApps(self, att: Attendee) -> bool:
+        """ Whether there is an empty app of a company wanting $att which $att can't take """
+
+        blocked = self.getCompaniesWant(att) & self.isEmpty & ~self.matrix[self.attToIndex[att]]
+        return bool(blocked.any())
+
+    def getCompanyApps(self, att: Attendee) -> list[Appointment]:
+        """ Empty apps of companies wanting $att, in column order """
+
+        wanted = self.getCompaniesWant(att) & self.isEmpty
+        return [self.apps[i] for i in np.flatnonzero(wanted)]
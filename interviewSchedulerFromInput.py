@@ -1,46 +1,333 @@
 from __future__ import annotations
 from datetime import datetime, timedelta
-from typing import Callable
+from typing import Callable, Optional
+from random import Random
+from math import exp
+from time import monotonic
+from copy import deepcopy
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext, redirect_stdout
+from io import StringIO
+from heapq import heapify, heappop, heappush
 
 from parseTable import getFileContents, readAttendeeBreaks, readAttendeeNames, readAttendeePrefs, readCoffeeChat, readCoffeeChatCandidates, readCompanyRoomNames, readConventionTimes, readInterviewCandidates, readRoomBreaks, readRoomInterviews, setAttendeeAndCompanies, tryToReadTable
-from serverUtilities import EXCEL_DATETIME_FORMAT, Appointment, AppointmentIntersects, Attendee, Company, TimeIntervalHash, ValidationException, TimeInterval, canSwapBoth, getJsonSchedule, getNoApps, getNoNotEmptyApps, getUtility, shouldSwap, swapBoth, trySwapBoth
+from serverUtilities import EXCEL_DATETIME_FORMAT, Appointment, AppointmentIntersects, Attendee, Company, TimeIntervalHash, ValidationException, TimeInterval, canSwapBoth, getAttToCoffeeChatRooms, getAttUtility, getJsonSchedule, isPastDeadline, ScheduleMetrics, shouldSwap, swapBoth, trySwapBoth
 from Schema import *
 from writeSchedule import writeSchedule
+from minCostFlow import matchInterviewsMinCostFlow
+from feasibilityMatrix import FeasibilityMatrix
 import cProfile
+import argparse
 
 def getAttToMaxRank(companies: list[Company], attendees: list[Attendee], isCoffeeChat: bool):
     attToMaxRank = {a:0 for a in attendees}
     if isCoffeeChat:
+        attToRooms = getAttToCoffeeChatRooms(companies)
         for att in attendees:
-            for c in companies:
-                for r in c.rooms:
-                    if r.wantsAttendee(att, True):
-                        attToMaxRank[att] = max(
-                            r.coffeeChat.companyPref(att), 
-                            attToMaxRank[att]
-                        )
+            for r in attToRooms.get(att, []):
+                attToMaxRank[att] = max(
+                    r.coffeeChat.companyPref(att), 
+                    attToMaxRank[att]
+                )
     return attToMaxRank
 
 
-def run(companies: list[Company], attendees: list[Attendee], conventionTimes: list[TimeInterval]) -> dict:
-    print("start:", datetime.now().strftime("%H:%M:%S"))
+class EmptyAppsCount:
+    """ For every time, the number of apps at that time tryMatchEveryone treats as empty
+
+        This counts what used to be a copy of $appIntersects.appsAtTime where each filled app
+        was removed from its own time and from the times of the apps left at its time,
+        which misses times whose apps have all been filled already. That is kept as is,
+        the counts are what tryMatchEveryone uses to break ties.
+    """
+
+    def __init__(self, appsAtTime: dict[TimeIntervalHash, set[Appointment]]):
+        self.counts = {timeHash: len(apps) for timeHash, apps in appsAtTime.items()}
+        # time -> other time -> number of apps of the other time counted at time
+        self.timeCounts: dict[TimeIntervalHash, dict[TimeIntervalHash, int]] = {}
+        for timeHash, apps in appsAtTime.items():
+            timeCounts = self.timeCounts[timeHash] = {}
+            for app in apps:
+                timeCounts[app.timeHash] = timeCounts.get(app.timeHash, 0) + 1
+
+    def get(self, timeHash: TimeIntervalHash) -> int:
+        return self.counts[timeHash]
+
+    def fill(self, app: Appointment):
+        timeHash = app.timeHash
+        timeCounts = self.timeCounts[timeHash]
+        timeCounts[timeHash] -= 1
+        self.counts[timeHash] -= 1
+        for otherTimeHash, count in timeCounts.items():
+            if otherTimeHash != timeHash and count > 0:
+                self.timeCounts[otherTimeHash][timeHash] -= 1
+                self.counts[otherTimeHash] -= 1
+
+
+def getAppAtts(companies: list[Company], isCoffeeChat: bool) -> list[list]:
+    """ [app, attendee] for every app, and [None, attendee] for every candidate of a room not in it """
+
+    appAtts = []
+    for c in companies:
+        for room in c.rooms:
+            if isCoffeeChat and room.coffeeChat is None:
+                continue
+            attsNotChosen = set(
+                room.coffeeChat.candidates if isCoffeeChat else room.candidates
+            )
+            for app in room.appointments:
+                if app.isCoffeeChat() == isCoffeeChat:
+                    appAtts.append([app, app.attendee])
+                    if not app.isEmpty():
+                        attsNotChosen.remove(app.attendee)
+            appAtts.extend([[None, att] for att in attsNotChosen])
+    return appAtts
+
+def minRank(
+        companies: list[Company], 
+        appIntersects: AppointmentIntersects, 
+        isCoffeeChat: bool, 
+        bestImprovement: bool = False, 
+        rng: Optional[Random] = None,
+        deadline: Optional[float] = None,
+        progress: Optional[Callable[[], None]] = None
+    ) -> bool:
+    """ Swap attendees between pairs of (app, attendee) entries until no swap lowers the total rank.
+
+        Whether a pair of entries should swap only depends on the entries themselves
+        and on the other apps of their two attendees, so after a swap only the entries
+        of the two attendees involved need to be looked at again.
+        If $bestImprovement, each entry takes the best swap available to it,
+        otherwise the first one found. The entries are shuffled by $rng if given.
+        $progress is called before every entry looked at.
+        Stops early once $deadline has passed, return whether it finished.
+    """
+
+    appAtts = getAppAtts(companies, isCoffeeChat)
+    if rng:
+        rng.shuffle(appAtts)
+
+    attToEntries: dict[Attendee, set[int]] = {}
+    for i, (_, att) in enumerate(appAtts):
+        if att is not None:
+            attToEntries.setdefault(att, set()).add(i)
+
+    # dirty entries, lowest index first
+    worklist = list(range(len(appAtts)))
+    isDirty = [True] * len(appAtts)
+
+    while worklist:
+        if isPastDeadline(deadline):
+            return False
+        if progress:
+            progress()
+        i = heappop(worklist)
+        isDirty[i] = False
+        currentApp, currentAtt = appAtts[i]
+
+        bestJ, bestGain = None, 0
+        for j in range(len(appAtts)):
+            existingApp, existingAtt = appAtts[j]
+            if currentAtt == existingAtt:
+                continue
+            if currentAtt is None and existingAtt is None: continue
+            if currentApp is None and existingApp is None: continue
+
+            """
+            if any(app1 and att1 and not app2
+                for app1,att1,app2,att2 in (
+                    (currentApp, currentAtt, existingApp, existingAtt),
+                    (existingApp, existingAtt, currentApp, currentAtt)
+                )
+            ): continue
+            # this condition will increase expected rank (bad), but it will help
+            # preserve the heuristic of tryMatchEveryone,
+            # foremost enabling people to have at least 1 interview
+            """
+
+            if shouldSwap(currentApp, currentAtt, existingApp, existingAtt, appIntersects):
+                if not bestImprovement:
+                    bestJ = j
+                    break
+                gain = (
+                    getAttUtility(currentApp, currentAtt) + getAttUtility(existingApp, existingAtt)
+                    - getAttUtility(currentApp, existingAtt) - getAttUtility(existingApp, currentAtt)
+                )
+                if bestGain < gain:
+                    bestJ, bestGain = j, gain
+
+        if bestJ is None:
+            continue
+
+        existingApp, existingAtt = appAtts[bestJ]
+        swapBoth(currentApp, currentAtt, existingApp, existingAtt, appIntersects)
+        appAtts[i][1] = existingAtt
+        appAtts[bestJ][1] = currentAtt
+
+        for att in (currentAtt, existingAtt):
+            if att is not None:
+                attToEntries[att].symmetric_difference_update((i, bestJ))
+        for k in (i, bestJ):
+            if not isDirty[k]:
+                isDirty[k] = True
+                heappush(worklist, k)
+        for att in (currentAtt, existingAtt):
+            for k in attToEntries.get(att, ()):
+                if not isDirty[k]:
+                    isDirty[k] = True
+                    heappush(worklist, k)
+
+    return True
+
+def anneal(
+        companies: list[Company], 
+        appIntersects: AppointmentIntersects, 
+        isCoffeeChat: bool, 
+        iterations: int,
+        startTemperature: float,
+        endTemperature: float,
+        rng: Optional[Random] = None,
+        deadline: Optional[float] = None,
+        trace: Optional[list[dict]] = None,
+        traceEvery: int = 10000,
+        progress: Optional[Callable[[], None]] = None
+    ) -> bool:
+    """ Simulated annealing over the same swaps as minRank, between two random entries.
+
+        A swap with an entry without an app or attendee moves the attendee in or out.
+        Worse swaps are accepted with probability exp(-delta / temperature), the temperature
+        falls geometrically from $startTemperature to $endTemperature over $iterations.
+        The best schedule seen is restored at the end, by undoing the swaps made since,
+        or from a copy of its attendees once there are more swaps than entries.
+        Every $traceEvery iterations, the current and best cost are appended to $trace and $progress is called.
+        Stops early once $deadline has passed, return whether it finished.
+    """
+
+    rng = rng or Random(0)
+    appAtts = getAppAtts(companies, isCoffeeChat)
+    if len(appAtts) < 2 or iterations <= 0:
+        return True
+
+    cost = bestCost = sum(getAttUtility(app, att) for app, att in appAtts)
+    cooling = (endTemperature / startTemperature) ** (1 / iterations)
+    temperature = startTemperature
+    sinceBest: list[tuple[int, int]] = [] # swaps made since the best schedule, to undo them
+    bestAtts: Optional[list[Optional[Attendee]]] = None # the best schedule's atts, instead of $sinceBest
+
+    def canMove(app, att) -> bool:
+        return app is None or app.companyRoom.wantsAttendee(att, isCoffeeChat)
+
+    completed = True
+    for iteration in range(iterations):
+        if iteration % traceEvery == 0:
+            if isPastDeadline(deadline):
+                completed = False
+                break
+            if trace is not None:
+                trace.append({'iteration': iteration, 'cost': cost, 'bestCost': bestCost})
+            if progress:
+                progress()
+        temperature *= cooling
+
+        i = rng.randrange(len(appAtts))
+        j = rng.randrange(len(appAtts))
+        app1, att1 = appAtts[i]
+        app2, att2 = appAtts[j]
+        if att1 == att2: continue
+        if app1 is None and app2 is None: continue
+        if not (canMove(app1, att2) and canMove(app2, att1)): continue
+
+        delta = (
+            getAttUtility(app1, att2) + getAttUtility(app2, att1)
+            - getAttUtility(app1, att1) - getAttUtility(app2, att2)
+        )
+        if delta > 0 and rng.random() >= exp(-delta / temperature):
+            continue
+        if not canSwapBoth(app1, att1, app2, att2, appIntersects):
+            continue
+
+        swapBoth(app1, att1, app2, att2, appIntersects)
+        appAtts[i][1], appAtts[j][1] = att2, att1
+        cost += delta
+        if cost < bestCost:
+            bestCost = cost
+            sinceBest.clear()
+            bestAtts = None
+        elif bestAtts is None:
+            sinceBest.append((i, j))
+            if len(sinceBest) > len(appAtts):
+                bestAtts = [att for _, att in appAtts]
+                for k, l in reversed(sinceBest):
+                    bestAtts[k], bestAtts[l] = bestAtts[l], bestAtts[k]
+                sinceBest.clear()
+    else:
+        iteration = iterations
+
+    if bestAtts is None:
+        for i, j in reversed(sinceBest):
+            (app1, att1), (app2, att2) = appAtts[i], appAtts[j]
+            swapBoth(app1, att1, app2, att2, appIntersects)
+            appAtts[i][1], appAtts[j][1] = att2, att1
+    else:
+        # empty the apps which changed first, so the best atts never conflict with the current ones
+        changed = [k for k, (app, att) in enumerate(appAtts) if app is not None and att != bestAtts[k]]
+        for k in changed:
+            appAtts[k][0].swap(None, appIntersects, None)
+        for k in changed:
+            appAtts[k][0].swap(bestAtts[k], appIntersects, None)
+        for k, att in enumerate(bestAtts):
+            appAtts[k][1] = att
+    cost = bestCost
+
+    if trace is not None:
+        trace.append({'iteration': iteration, 'cost': cost, 'bestCost': bestCost})
+    return completed
+
+
+SOLVERS = ('greedy', 'mincostflow')
+PROGRESS_INTERVAL = 1.0 # s, between the phaseProgress events of runPhases
+
+def runPhases(
+        companies: list[Company], 
+        attendees: list[Attendee], 
+        bestImprovement: bool,
+        solver: str,
+        rng: Optional[Random] = None,
+        deadline: Optional[float] = None,
+        annealIterations: int = 0,
+        annealTemperatures: tuple[float, float] = (5.0, 0.05),
+        onProgress: Optional[Callable[[dict], None]] = None
+    ) -> tuple[AppointmentIntersects, list[dict]]:
+    """ Fill the schedule of $companies in place, ties are broken randomly by $rng if given
+
+        The phases filling the schedule always run, the ones improving it
+        stop once $deadline has passed. If $annealIterations, interviews and coffee chats
+        are also annealed from the first to the second of $annealTemperatures.
+        $onProgress is called with a phaseStart and a phaseEnd event around every phase,
+        and with phaseProgress events while it runs.
+        Return a summary of every phase.
+    """
 
-    noApps = getNoApps(companies)
+    print("start:", datetime.now().strftime("%H:%M:%S"))
 
     print('getOverlappingApps')
     appIntersects = AppointmentIntersects(companies)
 
-    def initEmptyAppsCache(appIntersects: AppointmentIntersects) -> dict[TimeIntervalHash, set[Appointment]]:
-        return {
-            timeIntHash:appSet.copy() 
-            for timeIntHash,appSet 
-            in appIntersects.appsAtTime.items()
-        }
-
-    def updateEmptyAppsCache(cache: dict[TimeIntervalHash, set[Appointment]], notEmptyApp: Appointment):
-        cache[notEmptyApp.timeHash].remove(notEmptyApp)
-        for app in cache[notEmptyApp.timeHash]:
-            cache[app.timeHash] = cache[app.timeHash] - {notEmptyApp}
+    phaseName: Optional[str] = None
+    lastProgress = monotonic()
+    def reportProgress():
+        """ Send a phaseProgress event with the current metrics, at most every $PROGRESS_INTERVAL seconds """
+
+        nonlocal lastProgress
+        if not onProgress or monotonic() - lastProgress < PROGRESS_INTERVAL:
+            return
+        lastProgress = monotonic()
+        onProgress({
+            'type': 'phaseProgress',
+            'name': phaseName,
+            'totalUtility': appIntersects.metrics.totalRanks,
+            'noAppointmentsNotEmpty': appIntersects.metrics.noAppsNotEmpty
+        })
 
     def tryMatchEveryone(isCoffeeChat: bool):
 
@@ -65,149 +352,106 @@ def run(companies: list[Company], attendees: list[Attendee], conventionTimes: li
 
         attToNoCompaniesInvited = {a: a.getNoCompaniesWant(companies, isCoffeeChat) for a in atts}
 
-        emptyAppsCache = initEmptyAppsCache(appIntersects)
-        # deep copy
+        emptyAppsCount = EmptyAppsCount(appIntersects.appsAtTime)
 
-        while True:
-            changed  = False
-
-            atts = sorted(
-                atts, 
-                key = lambda att: (
-                    attToNoMaxRank[att],
-                    attToCompaniesAttending[att],
-                    attToNoCompaniesInvited[att],
-                    -len(att.commitments)
-                )
-            )
-            for newAtt in atts:
+        feasible = FeasibilityMatrix(companies, atts, appIntersects, isCoffeeChat)
 
+        getKey = lambda att: (
+            attToNoMaxRank[att],
+            attToCompaniesAttending[att],
+            attToNoCompaniesInvited[att],
+            -len(att.commitments)
+        )
+        # only the attendee just placed changes its key, it's pushed back with the new one,
+        #   attendees which can't be placed anymore drop out
+        order = list(range(len(atts)))
+        if rng:
+            rng.shuffle(order)
+        attToSeq = dict(zip(atts, order))
+        queue = [(getKey(att), seq, att) for att, seq in attToSeq.items()]
+        heapify(queue)
+        # fills only take options away, but a coffee chat blocker swap moves the interview of
+        #   the attendee swapped with, who is pushed back if they had dropped out (once, so it ends)
+        dropped: set[Attendee] = set()
+        requeued: set[Attendee] = set()
+
+        while queue:
+            reportProgress()
+            _, seq, newAtt = heappop(queue)
+
+            if isCoffeeChat and feasible.hasBlockedApps(newAtt):
                 validApps: list[Appointment] = []
-                for c in companies:
-                    if c.wantsAttendee(newAtt, isCoffeeChat):
-                        for app in c.getAppointments():
-                            if app.isEmpty() and app.isCoffeeChat() == isCoffeeChat:
-                                if app.canSwap(newAtt, appIntersects, None):
+                for app in feasible.getCompanyApps(newAtt):
+                    if feasible.canSwap(newAtt, app):
+                        validApps.append(app)
+                    else:
+                        # a little logic to handle coffee chats overlapping with apps
+                        appAtTime = appIntersects.getOtherAppAtTime(newAtt, app)
+                        if appAtTime is None or appAtTime.isCoffeeChat():
+                            continue
+                        for appAtTimeSwap in appAtTime.companyRoom.appointments:
+                            if appAtTimeSwap in (app, appAtTime) or appAtTimeSwap.attendee == newAtt:
+                                continue
+                            swapAtt = appAtTimeSwap.attendee
+                            if trySwapBoth(appAtTime, appAtTime.attendee, appAtTimeSwap, swapAtt, appIntersects):
+                                print('\t\tswapped out a coffee chat blocker')
+                                for att in (newAtt, swapAtt):
+                                    if att in feasible.attToIndex:
+                                        feasible.updateAttendee(att)
+                                if swapAtt in dropped and swapAtt not in requeued:
+                                    dropped.remove(swapAtt)
+                                    requeued.add(swapAtt)
+                                    heappush(queue, (getKey(swapAtt), attToSeq[swapAtt], swapAtt))
+                                if feasible.canSwap(newAtt, app):
+                                    print('\t\tcoffee chat added after blocker swapped')
                                     validApps.append(app)
-                                elif isCoffeeChat:
-                                    # a little logic to handle coffee chats overlapping with apps
-                                    appAtTime = appIntersects.getOtherAppAtTime(newAtt, app)
-                                    if appAtTime is None or appAtTime.isCoffeeChat():
-                                        continue
-                                    for appAtTimeSwap in appAtTime.companyRoom.appointments:
-                                        if appAtTimeSwap in (app, appAtTime) or appAtTimeSwap.attendee == newAtt:
-                                            continue
-                                        if trySwapBoth(appAtTime, appAtTime.attendee, appAtTimeSwap, appAtTimeSwap.attendee, appIntersects):
-                                            print('\t\tswapped out a coffee chat blocker')
-                                            if app.canSwap(newAtt, appIntersects, None):
-                                                print('\t\tcoffee chat added after blocker swapped')
-                                                validApps.append(app)
-                                            break
-
-
-                if validApps:
-                    appMaxKey = lambda app: (
-                        (
-                            len(emptyAppsCache[app.timeHash]), 
-                            -app.getUtility(newAtt),
-                            -len(app.companyRoom.coffeeChat.candidates),
-                            -app.companyRoom.coffeeChat.capacity,
-                        ) if isCoffeeChat else (
-                            len(emptyAppsCache[app.timeHash]), 
-                            -len(app.companyRoom.candidates),
-                            -len(app.companyRoom.times),
-                            -app.getUtility(newAtt)
-                        )
+                                break
+            else:
+                validApps = feasible.getValidApps(newAtt)
+
+            if validApps:
+                appMaxKey = lambda app: (
+                    (
+                        emptyAppsCount.get(app.timeHash), 
+                        -app.getUtility(newAtt),
+                        -len(app.companyRoom.coffeeChat.candidates),
+                        -app.companyRoom.coffeeChat.capacity,
+                        rng.random() if rng else 0
+                    ) if isCoffeeChat else (
+                        emptyAppsCount.get(app.timeHash), 
+                        -len(app.companyRoom.candidates),
+                        -len(app.companyRoom.times),
+                        -app.getUtility(newAtt),
+                        rng.random() if rng else 0
                     )
-                    app = max(validApps, key=lambda app: appMaxKey(app))
-                        # choose the least busy spot with the lowest preference
-                    app.swap(newAtt, appIntersects, None)
-                    attToCompaniesAttending[newAtt] += 1
-                    updateEmptyAppsCache(emptyAppsCache, app)
-                    changed = True
-
-            if not changed:
-                break
+                )
+                app = max(validApps, key=lambda app: appMaxKey(app))
+                    # choose the least busy spot with the lowest preference
+                app.swap(newAtt, appIntersects, None)
+                feasible.fill(app, newAtt)
+                attToCompaniesAttending[newAtt] += 1
+                emptyAppsCount.fill(app)
+                heappush(queue, (getKey(newAtt), seq, newAtt))
+            else:
+                dropped.add(newAtt)
 
     def printStatus():
+        metrics = appIntersects.metrics
         print(
             "\tutility:", 
-            f'{getUtility(companies)}', 
+            f'{metrics.utility}', 
             'matched:', 
-            f'{getNoNotEmptyApps(companies)}/{noApps}\n'
+            f'{metrics.noAppsNotEmpty}/{metrics.noApps}\n'
         )
 
-    print('\ttryMatchEveryone')
-    tryMatchEveryone(False)
-    printStatus()
-
-    def minRank(isCoffeeChat: bool):
-
-        appAtts = []
-        for c in companies:
-            for room in c.rooms:
-                if isCoffeeChat and room.coffeeChat is None:
-                    continue
-                attsNotChosen = set(
-                    room.coffeeChat.candidates if isCoffeeChat else room.candidates
-                )
-                for app in room.appointments:
-                    if app.isCoffeeChat() == isCoffeeChat:
-                        appAtts.append([app, app.attendee])
-                        if not app.isEmpty():
-                            attsNotChosen.remove(app.attendee)
-                appAtts.extend([[None, att] for att in attsNotChosen])
-
-        while True:
-
-            changed = False
-            
-            i = 0
-            for i in range(len(appAtts)-1):
-                currentApp, currentAtt = appAtts[i]
-                for j in range(i+1, len(appAtts)):
-                    existingApp, existingAtt = appAtts[j]
-                    if currentAtt == existingAtt:
-                        continue
-                    if all(a is None for a in (currentAtt, existingAtt)): continue
-                    if all(a is None for a in (currentApp, existingApp)): continue
-                    
-                    """
-                    if any(app1 and att1 and not app2
-                        for app1,att1,app2,att2 in (
-                            (currentApp, currentAtt, existingApp, existingAtt), 
-                            (existingApp, existingAtt, currentApp, currentAtt)
-                        )
-                    ): continue
-                    # this condition will increase expected rank (bad), but it will help
-                    # preserve the heuristic of tryMatchEveryone, 
-                    # foremost enabling people to have at least 1 interview
-                    """
-
-                    if shouldSwap(currentApp, currentAtt, existingApp, existingAtt, appIntersects):
-                        swapBoth(currentApp, currentAtt, existingApp, existingAtt, appIntersects)
-                        appAtts[i][1] = existingAtt
-                        appAtts[j][1] = currentAtt
-                        changed = True
-                        break
-
-                if changed: break
-            
-            if not changed: break
-
-    print('\tminRank')
-    minRank(False)
-    printStatus()
-
-    def moveToStartOfDay():
+    def moveToStartOfDay() -> bool:
             
         while True:
             changed = False
             for c in companies:
-
                 apps = sorted(
                     (a for a in c.getAppointments() if not a.isCoffeeChat()), 
-                    key=lambda app: app.time.timestamp()
+                    key=lambda app: app.time
                 )
 
                 for i in range(len(apps)):
@@ -217,6 +461,9 @@ def run(companies: list[Company], attendees: list[Attendee], conventionTimes: li
                     for j in reversed(range(i + 1, len(apps))):
                         app2 = apps[j]
                         if not app2.isEmpty():
+                            if isPastDeadline(deadline):
+                                return False
+                            reportProgress()
                             att2 = app2.attendee
                             app2.swap(None, appIntersects, None)
                             
@@ -247,50 +494,253 @@ def run(companies: list[Company], attendees: list[Attendee], conventionTimes: li
                                     break
                     
             if not changed: break
-                
-    print('\tmoveToStartOfDay')
-    moveToStartOfDay()
-    printStatus()
-
-    print('\tminRank')
-    minRank(False)
-    printStatus()
 
-    print('\n\ttryMatchEveryone coffee chat')
-    tryMatchEveryone(True)
-    printStatus()
+        return True
+
+    phases = []
+    def runPhase(name: str, phase: Callable[[], Optional[bool]], details: Optional[dict] = None):
+        """ Run $phase, it returns False if it stopped at the deadline, $details are added to its summary """
+
+        nonlocal phaseName
+        phaseName = name
+        print(f'\t{name}')
+        if onProgress:
+            onProgress({'type': 'phaseStart', 'name': name})
+        start = monotonic()
+        completed = phase() is not False
+        printStatus()
+        phases.append({
+            'name': name,
+            'completed': completed,
+            'seconds': monotonic() - start,
+            'totalUtility': appIntersects.metrics.totalRanks,
+            'noAppointmentsNotEmpty': appIntersects.metrics.noAppsNotEmpty,
+            **(details or {})
+        })
+        if onProgress:
+            onProgress({'type': 'phaseEnd', **phases[-1]})
+
+    def runAnnealPhase(name: str, isCoffeeChat: bool):
+        if not annealIterations:
+            return
+        trace = []
+        runPhase(
+            name, 
+            lambda: anneal(
+                companies, 
+                appIntersects, 
+                isCoffeeChat, 
+                annealIterations, 
+                *annealTemperatures, 
+                rng, 
+                deadline, 
+                trace,
+                progress=reportProgress
+            ),
+            {'trace': trace}
+        )
 
-    print('\tminRank coffee chat')
-    minRank(True)
-    printStatus() 
+    if solver == 'mincostflow':
+        runPhase('matchInterviewsMinCostFlow', lambda: matchInterviewsMinCostFlow(companies, attendees, appIntersects, deadline, reportProgress))
+    else:
+        runPhase('tryMatchEveryone', lambda: tryMatchEveryone(False))
+    runPhase('minRank', lambda: minRank(companies, appIntersects, False, bestImprovement, rng, deadline, reportProgress))
+    runAnnealPhase('anneal', False)
+    runPhase('moveToStartOfDay', moveToStartOfDay)
+    runPhase('minRank', lambda: minRank(companies, appIntersects, False, bestImprovement, rng, deadline, reportProgress))
+    runPhase('tryMatchEveryone coffee chat', lambda: tryMatchEveryone(True))
+    runPhase('minRank coffee chat', lambda: minRank(companies, appIntersects, True, bestImprovement, rng, deadline, reportProgress))
+    runAnnealPhase('anneal coffee chat', True)
 
     print("stop:", datetime.now().strftime("%H:%M:%S"))
 
-    return getJsonSchedule(
-        companies, 
-        attendees, 
-        conventionTimes
+    return appIntersects, phases
+
+def getScheduleKey(attendees: list[Attendee], metrics: ScheduleMetrics) -> tuple[int, int, int]:
+    """ Lower is better: fewest attendees without an appointment, then most appointments, then lowest totalUtility """
+    return (
+        len(attendees) - metrics.getNoAttendeesChosen(),
+        -metrics.noAppsNotEmpty,
+        metrics.totalRanks
     )
 
+def getAssignment(companies: list[Company], attendees: list[Attendee]) -> list[Optional[int]]:
+    """ Index into $attendees of every app's attendee, apps in the order of companies -> rooms -> appointments """
+
+    attToIndex = {att: i for i, att in enumerate(attendees)}
+    return [
+        None if app.isEmpty() else attToIndex[app.attendee]
+        for c in companies for app in c.getAppointments()
+    ]
+
+def setAssignment(companies: list[Company], attendees: list[Attendee], assignment: list[Optional[int]]):
+    apps = [app for c in companies for app in c.getAppointments()]
+    for app, attIndex in zip(apps, assignment):
+        app.setAttendee(None if attIndex is None else attendees[attIndex])
+
+def runSeed(
+        companies: list[Company], 
+        attendees: list[Attendee], 
+        bestImprovement: bool, 
+        solver: str, 
+        seed: int,
+        deadline: Optional[float],
+        annealIterations: int,
+        annealTemperatures: tuple[float, float]
+    ) -> tuple[tuple[int, int, int], list[Optional[int]], list[dict]]:
+    """ Run the phases on a copy of the model, seed 0 keeps the deterministic tie-breaks,
+        return the schedule's key, assignment and phases
+    """
+
+    companies, attendees = deepcopy((companies, attendees))
+    with redirect_stdout(StringIO()):
+        appIntersects, phases = runPhases(
+            companies, 
+            attendees, 
+            bestImprovement, 
+            solver, 
+            Random(seed) if seed else None,
+            deadline,
+            annealIterations,
+            annealTemperatures
+        )
+    return (
+        getScheduleKey(attendees, appIntersects.metrics), 
+        getAssignment(companies, attendees),
+        phases
+    )
+
+def throwIfInvalidRunArgs(
+        solver: str = 'greedy',
+        workers: int = 1,
+        seeds: int = 1,
+        timeLimit: Optional[float] = None,
+        annealIterations: int = 0,
+        annealTemperatures: tuple[float, float] = (5.0, 0.05)
+    ):
+    """ Raise a ValidationException unless the arguments of run() are valid """
+
+    ValidationException.throwIfFalse(solver in SOLVERS, f'unknown solver "{solver}", expected one of {", ".join(SOLVERS)}')
+    ValidationException.throwIfFalse(workers >= 1, 'workers must be at least 1')
+    ValidationException.throwIfFalse(seeds >= 1, 'seeds must be at least 1')
+    ValidationException.throwIfFalse(timeLimit is None or timeLimit >= 0, 'timeLimit can\'t be negative')
+    ValidationException.throwIfFalse(annealIterations >= 0, 'annealIterations can\'t be negative')
+    ValidationException.throwIfFalse(
+        0 < annealTemperatures[1] <= annealTemperatures[0], 
+        'anneal temperatures must be positive and decreasing'
+    )
+
+def run(
+        companies: list[Company], 
+        attendees: list[Attendee], 
+        conventionTimes: list[TimeInterval],
+        bestImprovement: bool = False,
+        solver: str = 'greedy',
+        workers: int = 1,
+        seeds: int = 1,
+        timeLimit: Optional[float] = None,
+        annealIterations: int = 0,
+        annealTemperatures: tuple[float, float] = (5.0, 0.05),
+        onProgress: Optional[Callable[[dict], None]] = None
+    ) -> dict:
+    """ Fill the schedule of $companies in place and return it as json
+
+        If $seeds > 1, the phases are run that many times with different tie-breaks,
+        on $workers processes, and the best schedule is kept.
+        If $timeLimit (seconds) runs out, the improvement phases are cut short,
+        the json's phases tell which ones completed.
+        If $annealIterations, the schedule is also annealed, see anneal().
+        $onProgress is called with an event (a dict with a 'type') around and during every phase,
+        or after every seed if there are several.
+    """
+
+    throwIfInvalidRunArgs(solver, workers, seeds, timeLimit, annealIterations, annealTemperatures)
+
+    deadline = None if timeLimit is None else monotonic() + timeLimit
+
+    if seeds == 1:
+        appIntersects, phases = runPhases(
+            companies, 
+            attendees, 
+            bestImprovement, 
+            solver, 
+            None, 
+            deadline, 
+            annealIterations, 
+            annealTemperatures,
+            onProgress
+        )
+        return {
+            **getJsonSchedule(
+                companies, 
+                attendees, 
+                conventionTimes,
+                appIntersects.metrics
+            ),
+            'phases': phases
+        }
+
+    print(f'running {seeds} seeds on {workers} workers')
+    args = [
+        (companies, attendees, bestImprovement, solver, seed, deadline, annealIterations, annealTemperatures)
+        for seed in range(seeds)
+    ]
+    def onSeedEnd(seed: int, key: tuple[int, int, int]):
+        print(f'\tseed {seed}: unmatched attendees {key[0]}, matched {-key[1]}, totalUtility {key[2]}')
+        if onProgress:
+            onProgress({
+                'type': 'seedEnd', 
+                'seed': seed, 
+                'unmatchedAttendees': key[0], 
+                'noAppointmentsNotEmpty': -key[1], 
+                'totalUtility': key[2]
+            })
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) if workers > 1 else nullcontext() as executor:
+        for result in (executor.map if executor else map)(runSeed, *zip(*args)):
+            onSeedEnd(len(results), result[0])
+            results.append(result)
+
+    key, assignment, phases = min(results, key=lambda result: result[0])
+    setAssignment(companies, attendees, assignment)
+
+    return {
+        **getJsonSchedule(companies, attendees, conventionTimes),
+        'phases': phases
+    }
+
 debugging = True
 
+DEBUGGING_TABLE_FILES = [
+    (readConventionTimes, 'interviewDays.csv'),
+    (readCompanyRoomNames, 'companyRoomList2.csv'),
+    (readRoomInterviews, 'roomInterviewList.csv'),
+    (readRoomBreaks, 'companyBreakList.csv'),
+    (readCoffeeChat, 'coffeeChatList.csv'),
+    (readAttendeeNames, 'attendeesList3.csv'),
+    (readAttendeeBreaks, 'attendeeBreaksList.csv'),
+    (readAttendeePrefs, 'attendeePreferencesList.csv'),
+    (readInterviewCandidates, 'roomCandidatesList.csv'),
+    (readCoffeeChatCandidates, 'coffeeChatCandidatesList2.csv')
+]
+
 if __name__ == "__main__":
+    argParser = argparse.ArgumentParser(description='create an interview schedule and write it to a csv file')
+    argParser.add_argument('--solver', choices=SOLVERS, default='greedy', help='how interviews are filled before they are improved by swaps')
+    argParser.add_argument('--best-improvement', action='store_true', help='take the best swap instead of the first one found')
+    argParser.add_argument('--seeds', type=int, default=1, help='number of runs with different tie-breaks, the best schedule is kept')
+    argParser.add_argument('--workers', type=int, default=1, help='number of processes the seeds are run on')
+    argParser.add_argument('--time-limit', type=float, default=None, help='seconds after which the improvement phases stop')
+    argParser.add_argument('--anneal-iterations', type=int, default=0, help='iterations of simulated annealing after minRank, 0 to skip it')
+    argParser.add_argument('--anneal-temperatures', type=float, nargs=2, default=(5.0, 0.05), metavar=('START', 'END'), help='temperature at the start and end of annealing')
+    args = argParser.parse_args()
+
     with SqliteDB() as cursor:
         clearAllTables(cursor)
 
         if debugging:
-            for func, filename in [
-                (readConventionTimes, 'interviewDays.csv'),
-                (readCompanyRoomNames, 'companyRoomList2.csv'),
-                (readRoomInterviews, 'roomInterviewList.csv'),
-                (readRoomBreaks, 'companyBreakList.csv'),
-                (readCoffeeChat, 'coffeeChatList.csv'),
-                (readAttendeeNames, 'attendeesList3.csv'),
-                (readAttendeeBreaks, 'attendeeBreaksList.csv'),
-                (readAttendeePrefs, 'attendeePreferencesList.csv'),
-                (readInterviewCandidates, 'roomCandidatesList.csv'),
-                (readCoffeeChatCandidates, 'coffeeChatCandidatesList2.csv')
-            ]:
+            for func, filename in DEBUGGING_TABLE_FILES:
                 func(getFileContents(filename), cursor)
         else:
             for func, tableName in [
@@ -316,7 +766,18 @@ if __name__ == "__main__":
         #cProfile.run('run(companies, attendees, GetConventionTimes(cursor))')
         
         print('creating schedule...')
-        run(companies, attendees, GetConventionTimes(cursor))
+        run(
+            companies, 
+            attendees, 
+            GetConventionTimes(cursor), 
+            bestImprovement=args.best_improvement, 
+            solver=args.solver,
+            workers=args.workers,
+            seeds=args.seeds,
+            timeLimit=args.time_limit,
+            annealIterations=args.anneal_iterations,
+            annealTemperatures=tuple(args.anneal_temperatures)
+        )
         filename = f"Interview Schedule {datetime.now().isoformat()[:-7].replace(':', '.')}.csv"
         writeSchedule(filename, companies)
         print(f"wrote schedule to file '{filename}'")
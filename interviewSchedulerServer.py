@@ -1,14 +1,15 @@
 from Schema import ATTENDEEBREAKS_TABLE, ATTENDEEPREFS_TABLE, ATTENDEES_TABLE, COFFEECHAT_TABLE, COFFEECHATCANDIDATES_TABLE, COMPANY_TABLE, COMPANYROOM_TABLE, CONVENTIONTIME_TABLE, INTERVIEWCANDIDATES_TABLE, ROOMBREAKS_TABLE, ROOMINTERVIEW_TABLE, GetCompanyRooms, GetConventionTimes
 import traceback
+import gzip
 import logging as notFlaskLogging
 from datetime import datetime
 from flask import *
-from typing import Callable, Any
+from typing import Callable, Any, Optional
 
-from serverUtilities import ValidationException
-from os import path
+from serverUtilities import ConflictException, QueueFullException, ValidationException, getJsonSchedule
+from os import cpu_count, path
 
-from SqliteLib import Column, SqliteDB, Table
+from SqliteLib import Column, SqliteConnectionPool, SqliteDB, Table
 from sqlite3 import OperationalError as sqlite3Error
 
 from parseTable import (
@@ -32,21 +33,62 @@ from parseSchedule import (
 
 from writeSchedule import writeSchedule
 from trySwap import trySwap
-from interviewSchedulerFromInput import run
+from interviewSchedulerFromInput import run, throwIfInvalidRunArgs
+from scheduleJobs import ScheduleJob, ScheduleJobQueue
+from scheduleSessions import ScheduleSessionStore
+from compactSchedule import COMPACT_FORMAT, getCompactSchedule
 
 notFlaskLogging.basicConfig(level=notFlaskLogging.DEBUG)
 app = Flask(__name__, static_folder='./react_app/build/static', template_folder="./react_app/build")
 
 ResponseType = tuple[dict[str, Any], int]
 
-def handleException(cursor: SqliteDB, e: Exception) -> ResponseType:
-    """ Roleback cursor, return 400 if validation error else 500 """
+connections = SqliteConnectionPool()
 
-    lastQuery = cursor.lastQuery # save before rollback
-    cursor.Rollback()
+MIN_GZIP_SIZE = 1024 # bytes
+
+@app.after_request
+def gzipResponse(response: Response) -> Response:
+    """ gzip json responses if the client accepts it """
+
+    if (
+        'gzip' not in request.headers.get('Accept-Encoding', '').lower()
+        or response.mimetype != 'application/json'
+        or response.direct_passthrough
+        or response.is_streamed
+        or 'Content-Encoding' in response.headers
+        or len(response.get_data()) < MIN_GZIP_SIZE
+    ):
+        return response
+
+    response.set_data(gzip.compress(response.get_data(), compresslevel=6))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+def getScheduleFormat(args) -> Callable[..., dict]:
+    """ getJsonSchedule, or getCompactSchedule with ?format=compact in the query string $args """
+
+    scheduleFormat = args.get('format', 'json')
+    ValidationException.throwIfFalse(
+        scheduleFormat in ('json', COMPACT_FORMAT),
+        f'format must be "json" or "{COMPACT_FORMAT}", not "{scheduleFormat}"'
+    )
+    return getCompactSchedule if scheduleFormat == COMPACT_FORMAT else getJsonSchedule
+
+def handleException(cursor: Optional[SqliteDB], e: Exception) -> ResponseType:
+    """ Roleback cursor (if any), return 400 if validation error, 409 if conflict, 429 if queue full else 500 """
+
+    lastQuery = cursor.lastQuery if cursor is not None else "" # save before rollback
+    if cursor is not None:
+        cursor.Rollback()
     traceback.print_exc()
 
-    if type(e) == ValidationException:
+    if isinstance(e, ConflictException):
+        return {"error": f"{str(e)}"}, 409
+    elif isinstance(e, QueueFullException):
+        return {"error": f"{str(e)}"}, 429
+    elif isinstance(e, ValidationException):
         return {"error": f"{str(e)}"}, 400
     else:
         errorMsg = f"Server Error: {str(type(e))} -- {str(e)}"
@@ -55,9 +97,9 @@ def handleException(cursor: SqliteDB, e: Exception) -> ResponseType:
         return {"error": errorMsg}, 500
 
 def setTable(request, setFunc: Callable[[str, SqliteDB], None], getFunc: Callable[[], ResponseType]) -> ResponseType:
-    """ Parse file from request, pass to setFunc, return getFunc """
+    """ Parse file from request, pass to setFunc, return getFunc once that is committed """
 
-    with SqliteDB() as cursor:
+    with connections.Cursor() as cursor:
         try:
             fileKey = 'table'
             ValidationException.throwIfFalse(
@@ -81,15 +123,15 @@ def setTable(request, setFunc: Callable[[str, SqliteDB], None], getFunc: Callabl
             doc = file.read().decode('utf-8').strip()
             setFunc(doc, cursor)
             #return {'data': [line.split(',') for line in doc.split('\n')][1:]}, 200
-            return getFunc()
 
         except Exception as e:
             return handleException(cursor, e)
+    return getFunc()
 
 def getTableReponse(table: Table) -> ResponseType:
     """ Get table, return reponse obj, handle exceptions """
 
-    with SqliteDB() as cursor:
+    with connections.Cursor(readOnly=True) as cursor:
         try:
             table = cursor.FetchAll(cursor.Q(table.GetColumns(), table))
             return {'data': [list(x.values()) for x in table]}, 200 # no need for keys
@@ -198,38 +240,184 @@ def setCoffeeChatCandidatesHandler() -> ResponseType:
 
 
 
-@app.route('/generateSchedule', methods=['GET'])
-def generateScheduleHandler() -> ResponseType:
+# limits of the run() arguments a request can ask for
+MAX_WORKERS = cpu_count() or 1
+MAX_SEEDS = 64
+MAX_ANNEAL_ITERATIONS = 10_000_000
+MAX_TIME_LIMIT = 300.0 # s, also the time limit of requests without one
+
+def getRunArgs(args) -> dict[str, Any]:
+    """ Keyword arguments of run() from the query string $args, validated before anything is run
+
+        workers are capped at the number of cpus and the time limit at $MAX_TIME_LIMIT.
+    """
+
+    seeds = args.get('seeds', 1, type=int)
+    ValidationException.throwIfFalse(seeds <= MAX_SEEDS, f'seeds must be at most {MAX_SEEDS}')
+    annealIterations = args.get('annealIterations', 0, type=int)
+    ValidationException.throwIfFalse(
+        annealIterations <= MAX_ANNEAL_ITERATIONS,
+        f'annealIterations must be at most {MAX_ANNEAL_ITERATIONS}'
+    )
+
+    runArgs = {
+        'solver': args.get('solver', 'greedy'),
+        'workers': min(args.get('workers', 1, type=int), MAX_WORKERS),
+        'seeds': seeds,
+        'timeLimit': min(args.get('timeLimit', MAX_TIME_LIMIT, type=float), MAX_TIME_LIMIT),
+        'annealIterations': annealIterations,
+        'annealTemperatures': (
+            args.get('annealStartTemperature', 5.0, type=float),
+            args.get('annealEndTemperature', 0.05, type=float)
+        )
+    }
+    throwIfInvalidRunArgs(**runArgs)
+    return runArgs
+
+scheduleSessions = ScheduleSessionStore()
+
+def generateSchedule(
+        runArgs: dict[str, Any], 
+        onProgress: Optional[Callable[[dict], None]] = None,
+        getScheduleJson: Callable[..., dict] = getJsonSchedule
+    ) -> dict:
+    """ Run the scheduler and keep the schedule in a session, its id is in the response
+
+        No transaction is open while the scheduler runs.
+    """
+
     companies = []
     attendees = []
+    with connections.Cursor(readOnly=True) as cursor:
+        setAttendeeAndCompanies(
+            cursor,
+            companies=companies,
+            attendees=attendees
+        )
+        conventionTimes = GetConventionTimes(cursor)
+
+    schedule = run(
+        companies,
+        attendees,
+        conventionTimes,
+        onProgress=onProgress,
+        **runArgs
+    )
+    with connections.Cursor() as cursor:
+        session = scheduleSessions.create(cursor, companies, attendees, conventionTimes, schedule)
+    if getScheduleJson is not getJsonSchedule:
+        schedule = {**session.getSchedule(getScheduleJson), 'phases': schedule['phases']}
+    return {**schedule, 'sessionId': session.id, 'version': session.version}
+
+@app.route('/generateSchedule', methods=['GET'])
+def generateScheduleHandler() -> ResponseType:
+    try:
+        return {'data': generateSchedule(getRunArgs(request.args), getScheduleJson=getScheduleFormat(request.args))}, 200
+    except Exception as e:
+        return handleException(None, e)
+
+
+# schedule jobs, generateSchedule on a background thread
+def runScheduleJob(job: ScheduleJob) -> dict:
+    return generateSchedule(job.params, job.addEvent)
+
+scheduleJobs = ScheduleJobQueue(runScheduleJob)
+
+@app.route('/jobs/generate', methods=['POST'])
+def generateScheduleJobHandler() -> ResponseType:
+    try:
+        job = scheduleJobs.submit(getRunArgs(request.args))
+        return {'data': job.toJson()}, 202
+    except Exception as e:
+        return handleException(None, e)
+
+@app.route('/jobs/<jobId>', methods=['GET'])
+def getScheduleJobHandler(jobId: str) -> ResponseType:
+    job = scheduleJobs.get(jobId)
+    if job is None:
+        return {'error': f'no job with id "{jobId}"'}, 404
+    return {'data': job.toJson()}, 200
+
+@app.route('/jobs/<jobId>/events', methods=['GET'])
+def getScheduleJobEventsHandler(jobId: str) -> Any:
+    """ Server-sent events of the job's progress, ends once the job is done or failed """
+
+    job = scheduleJobs.get(jobId)
+    if job is None:
+        return {'error': f'no job with id "{jobId}"'}, 404
+
+    def stream():
+        for event in job.iterEvents():
+            if event is None:
+                yield ': keep-alive\n\n'
+            else:
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+    return Response(stream(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
 
-    with SqliteDB() as cursor:
+@app.route('/swapSchedule', methods=['POST'])
+def swapScheduleHandler() -> ResponseType:
+    with connections.Cursor(readOnly=True) as cursor:
         try:
-            setAttendeeAndCompanies(
-                cursor,
-                companies=companies,
-                attendees=attendees
-            )
+            data = request.get_json()['data']
+            return {"data": trySwap(*parseJsonSwapSchedule(data), getScheduleFormat(request.args))}, 200
+        except Exception as e:
+            return handleException(cursor, e)
 
-            return {
-                'data': run(companies,attendees,GetConventionTimes(cursor))
-            }, 200
-                    
+# schedule sessions, swaps against a schedule kept on the server
+@app.route('/sessions', methods=['POST'])
+def createScheduleSessionHandler() -> ResponseType:
+    with connections.Cursor() as cursor:
+        try:
+            data = request.get_json()['data']
+            session = scheduleSessions.create(cursor, *parseJsonSchedule(data))
+            return {'data': {'sessionId': session.id, 'version': session.version}}, 200
         except Exception as e:
             return handleException(cursor, e)
 
-@app.route('/swapSchedule', methods=['POST'])
-def swapScheduleHandler() -> ResponseType:
-    with SqliteDB() as cursor:
+@app.route('/sessions/<sessionId>', methods=['GET'])
+def getScheduleSessionHandler(sessionId: str) -> ResponseType:
+    with connections.Cursor() as cursor:
         try:
+            session = scheduleSessions.get(cursor, sessionId)
+            if session is None:
+                return {'error': f'no session with id "{sessionId}"'}, 404
+            return {'data': session.toJson(getScheduleFormat(request.args))}, 200
+        except Exception as e:
+            return handleException(cursor, e)
+
+@app.route('/sessions/<sessionId>/swap', methods=['POST'])
+def swapScheduleSessionHandler(sessionId: str) -> ResponseType:
+    """ Same swap as /swapSchedule, only the apps and atts are sent
+
+        If data.version is given, the swap is only made at that version (409 otherwise).
+        Responds with the full schedule, or only the changed apps and the metrics with ?response=delta
+    """
+
+    with connections.Cursor() as cursor:
+        try:
+            responseMode = request.args.get('response', 'full')
+            ValidationException.throwIfFalse(
+                responseMode in ('full', 'delta'),
+                f'response must be "full" or "delta", not "{responseMode}"'
+            )
+            getScheduleJson = getScheduleFormat(request.args)
+
+            session = scheduleSessions.get(cursor, sessionId)
+            if session is None:
+                return {'error': f'no session with id "{sessionId}"'}, 404
+
             data = request.get_json()['data']
-            return {"data": trySwap(*parseJsonSwapSchedule(data))}, 200
+            apps = session.swap(data, cursor, data.get('version', None))
+            if responseMode == 'delta':
+                return {'data': session.getDeltaJson(apps)}, 200
+            return {'data': session.toJson(getScheduleJson)}, 200
         except Exception as e:
             return handleException(cursor, e)
 
 @app.route('/writeSchedule', methods=['POST'])
 def writeScheduleHandler() -> Any:
-    with SqliteDB() as cursor:
+    with connections.Cursor(readOnly=True) as cursor:
         try:
             data = request.get_json()['data']
             companies, atts, interviewTimes = parseJsonSchedule(data)
@@ -0,0 +1,192 @@
+from __future__ import annotations
+from heapq import heappop, heappush
+from typing import Callable, Optional
+
+from serverUtilities import Appointment, AppointmentIntersects, Attendee, Company, isPastDeadline
+from feasibilityMatrix import FeasibilityMatrix
+
+INFINITY = float('inf')
+
+class FlowGraph:
+    """ A directed graph with capacities and costs on its edges, solved by successive shortest paths """
+
+    def __init__(self, noNodes: int):
+        self.noNodes = noNodes
+        self.adj: list[list[int]] = [[] for _ in range(noNodes)]
+        # edge e goes to $self.to[e], its reverse edge is e ^ 1
+        self.to: list[int] = []
+        self.cap: list[int] = []
+        self.cost: list[int] = []
+
+    def addNode(self) -> int:
+        self.adj.append([])
+        self.noNodes += 1
+        return self.noNodes - 1
+
+    def addEdge(self, fromNode: int, toNode: int, cap: int, cost: int) -> int:
+        edge = len(self.to)
+        self.adj[fromNode].append(edge)
+        self.to.append(toNode)
+        self.cap.append(cap)
+        self.cost.append(cost)
+
+        self.adj[toNode].append(edge + 1)
+        self.to.append(fromNode)
+        self.cap.append(0)
+        self.cost.append(-cost)
+        return edge
+
+    def getFlow(self, edge: int) -> int:
+        return self.cap[edge ^ 1]
+
+    def getInitialPotentials(self, source: int) -> list[float]:
+        """ Shortest distances from $source with Bellman-Ford (queue based), costs may be negative """
+
+        dist = [INFINITY] * self.noNodes
+        dist[source] = 0
+        queue = [source]
+        inQueue = [False] * self.noNodes
+        inQueue[source] = True
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            inQueue[node] = False
+            for edge in self.adj[node]:
+                if self.cap[edge] > 0:
+                    newDist = dist[node] + self.cost[edge]
+                    toNode = self.to[edge]
+                    if newDist < dist[toNode]:
+                        dist[toNode] = newDist
+                        if not inQueue[toNode]:
+                            inQueue[toNode] = True
+                            queue.append(toNode)
+        return dist
+
+    def minCostMaxFlow(self, source: int, sink: int) -> tuple[int, int]:
+        """ Push as much flow as possible from $source to $sink at the least cost, return (flow, cost)
+
+            The graph must not have negative cost cycles.
+            Each iteration is a dijkstra on costs reduced by the node potentials.
+        """
+
+        to, cap, cost, adj = self.to, self.cap, self.cost, self.adj
+        potential = [0 if d == INFINITY else d for d in self.getInitialPotentials(source)]
+        totalFlow = totalCost = 0
+
+        while True:
+            dist = [INFINITY] * self.noNodes
+            prevEdge = [-1] * self.noNodes
+            dist[source] = 0
+            heap = [(0, source)]
+            while heap:
+                d, node = heappop(heap)
+                if d > dist[node]:
+                    continue
+                nodePotential = potential[node]
+                for edge in adj[node]:
+                    if cap[edge] > 0:
+                        toNode = to[edge]
+                        newDist = d + cost[edge] + nodePotential - potential[toNode]
+                        if newDist < dist[toNode]:
+                            dist[toNode] = newDist
+                            prevEdge[toNode] = edge
+                            heappush(heap, (newDist, toNode))
+
+            if dist[sink] == INFINITY:
+                break
+
+            for node in range(self.noNodes):
+                if dist[node] != INFINITY:
+                    potential[node] += dist[node]
+
+            pathCap = INFINITY
+            node = sink
+            while node != source:
+                edge = prevEdge[node]
+                pathCap = min(pathCap, cap[edge])
+                node = to[edge ^ 1]
+
+            node = sink
+            while node != source:
+                edge = prevEdge[node]
+                cap[edge] -= pathCap
+                cap[edge ^ 1] += pathCap
+                totalCost += pathCap * cost[edge]
+                node = to[edge ^ 1]
+            totalFlow += pathCap
+
+        return totalFlow, totalCost
+
+def assignInterviewsMinCostFlow(companies: list[Company], attendees: list[Attendee], appIntersects: AppointmentIntersects) -> int:
+    """ Fill as many empty interviews as possible with the lowest total rank, return how many were filled
+
+        source -> (attendee, company) -> app -> sink, every edge has capacity 1
+        and the edges into an app cost the attendee's rank of the company.
+        This encodes one interview per company, attendee commitments and the apps
+        attendees already have, but not two new interviews of an attendee at overlapping
+        times in different companies. Those are repaired by keeping the attendee's
+        best ranked interviews, the others are left empty for the next call.
+    """
+
+    graph = FlowGraph(2)
+    source, sink = 0, 1
+
+    appToNode: dict[Appointment, int] = {}
+    for c in companies:
+        for app in c.getAppointments():
+            if app.isEmpty() and not app.isCoffeeChat():
+                appToNode[app] = node = graph.addNode()
+                graph.addEdge(node, sink, 1, 0)
+
+    # the empty interviews each attendee can take, in the order of companies -> rooms -> appointments
+    feasible = FeasibilityMatrix(companies, attendees, appIntersects, False)
+
+    edgeToAppAtt: dict[int, tuple[Appointment, Attendee]] = {}
+    for att in attendees:
+        companyToPairNode: dict[Company, int] = {}
+        for app in feasible.getValidApps(att):
+            pairNode = companyToPairNode.get(app.company)
+            if pairNode is None:
+                pairNode = companyToPairNode[app.company] = graph.addNode()
+                graph.addEdge(source, pairNode, 1, 0)
+            edge = graph.addEdge(pairNode, appToNode[app], 1, app.getRank(att))
+            edgeToAppAtt[edge] = (app, att)
+
+    graph.minCostMaxFlow(source, sink)
+
+    attToApps: dict[Attendee, list[Appointment]] = {}
+    for edge, (app, att) in edgeToAppAtt.items():
+        if graph.getFlow(edge):
+            attToApps.setdefault(att, []).append(app)
+
+    noFilled = 0
+    for att, apps in attToApps.items():
+        for app in sorted(apps, key=lambda app: app.getRank(att)):
+            if app.canSwap(att, appIntersects, None):
+                app.swap(att, appIntersects, None)
+                noFilled += 1
+    return noFilled
+
+def matchInterviewsMinCostFlow(
+        companies: list[Company], 
+        attendees: list[Attendee], 
+        appIntersects: AppointmentIntersects, 
+        deadline: Optional[float] = None,
+        progress: Optional[Callable[[], None]] = None
+    ) -> bool:
+    """ Solve the interview assignment as a min cost flow until the repairs leave nothing else to fill,
+        $progress is called after every solve
+
+        The max flow maximises the number of interviews filled, not the number of distinct
+        attendees with one, unlike tryMatchEveryone. The minRank phase after it evens that out.
+        Every solve rebuilds the graph of the apps still empty, the first one always runs
+        and the repair solves stop once $deadline has passed, return whether it finished.
+    """
+
+    while assignInterviewsMinCostFlow(companies, attendees, appIntersects):
+        if progress:
+            progress()
+        if isPastDeadline(deadline):
+            return False
+    return True
@@ -1,20 +1,25 @@
 from datetime import datetime
 from typing import Optional
-from serverUtilities import CoffeeChat, Company, CompanyPreference, Attendee, TimeInterval, Appointment, ValidationException
+from compactSchedule import isCompactSchedule, parseCompactSchedule
+from serverUtilities import CoffeeChat, Company, CompanyPreference, Attendee, TimeInterval, Appointment, ValidationException, toMinutes
 
 def parseJsonSchedule(data: dict) -> tuple[
         list[Company], 
         list[Attendee], 
         list[TimeInterval]
     ]:
+    """ The model of a getJsonSchedule or getCompactSchedule """
+
+    if isCompactSchedule(data):
+        return parseCompactSchedule(data)
 
     attendeesJson, companiesJson = data['attendees'], data['companies']
 
     conventionTimes = [TimeInterval.fromStr(t['start'], t['end']) for t in data['conventionTimes']]
 
     companyNameToCompany: dict[str, Company] = {}
-    for companyName in companiesJson.keys():
-        companyNameToCompany[companyName] = Company(companyName)
+    for ordinal, companyName in enumerate(companiesJson.keys()):
+        companyNameToCompany[companyName] = Company(companyName, ordinal)
 
     attendeeIdToAttendee: dict[int, Attendee] = {}
     for attIdStr, attendeeJson in attendeesJson.items():
@@ -43,7 +48,7 @@ def parseJsonSchedule(data: dict) -> tuple[
             ):
                 att = appJson['att']
                 if att is not None:
-                    app.attendee = attendeeIdToAttendee[att]
+                    app.setAttendee(attendeeIdToAttendee[att])
 
             coffeeChatJson = roomJson.get('coffeeChat', None)
             if coffeeChatJson is not None:
@@ -58,7 +63,7 @@ def parseJsonSchedule(data: dict) -> tuple[
                 ):
                     att = appJson['att']
                     if att is not None:
-                        app.attendee = attendeeIdToAttendee[att]
+                        app.setAttendee(attendeeIdToAttendee[att])
 
 
     return (
@@ -80,24 +85,52 @@ def parseJsonSwapSchedule(data: dict) -> tuple[
     companies, attendees, conventionTimes = parseJsonSchedule(data)
 
     attendeeIdToAttendee = {att.uid:att for att in attendees}
-    companyNameToCompany = {c.name:c for c in companies}
+    app1, att1, app2, att2 = parseJsonSwap(data, attendeeIdToAttendee, getAppointmentIndex(companies))
+
+    return (
+        companies,
+        attendees,
+        conventionTimes,
+        app1,
+        att1,
+        app2,
+        att2
+    )
+
+def getAppointmentIndex(companies: list[Company]) -> dict[tuple[str, int], list[Appointment]]:
+    """ (room name, start minutes) -> the apps of the room starting then, in room order """
+
+    appIndex: dict[tuple[str, int], list[Appointment]] = {}
+    for company in companies:
+        for room in company.rooms:
+            for app in room.appointments:
+                appIndex.setdefault((room.name, app.time), []).append(app)
+    return appIndex
+
+def parseJsonSwap(
+        data: dict, 
+        attendeeIdToAttendee: dict[int, Attendee], 
+        appIndex: dict[tuple[str, int], list[Appointment]]
+    ) -> tuple[
+        Optional[Appointment], 
+        Optional[Attendee], 
+        Optional[Appointment], 
+        Optional[Attendee]
+    ]:
+    """ The apps and atts of the swap in $data, $appIndex is from getAppointmentIndex """
 
     def getApp(appJson: dict) -> Optional[Appointment]:
         if appJson is None:
             return None
 
-        for company in companies:
-            for room in company.rooms:
-                if room.name == appJson['room']:
-                    for app in room.appointments:
-                        if app.time == datetime.fromisoformat(appJson['start']):
-                            # datetime equality does not need to be the same object
-                            if app.attendee is None and appJson['att'] is None:
-                                return app
-                            elif app.attendee is None or appJson['att'] is None:
-                                continue
-                            elif app.attendee.uid == appJson['att']:
-                                return app
+        key = (appJson['room'], toMinutes(datetime.fromisoformat(appJson['start'])))
+        for app in appIndex.get(key, []):
+            if app.attendee is None and appJson['att'] is None:
+                return app
+            elif app.attendee is None or appJson['att'] is None:
+                continue
+            elif app.attendee.uid == appJson['att']:
+                return app
                                 
         raise ValidationException('what the hey?')
 
@@ -125,12 +158,4 @@ def parseJsonSwapSchedule(data: dict) -> tuple[
         'must be at least one att'
     )
 
-    return (
-        companies,
-        attendees,
-        conventionTimes,
-        app1,
-        att1,
-        app2,
-        att2
-    )
\ No newline at end of file
+    return app1, att1, app2, att2
\ No newline at end of file
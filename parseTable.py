@@ -48,7 +48,7 @@ def readConventionTimes(doc: str, cursor: SqliteDB):
             f"invalid interview day: interview day {interval} intersects with other intervals {conventionTimes}"
         )
         conventionTimes.append(interval)
-        AddConventionTime(cursor, interval)
+    AddConventionTimes(cursor, conventionTimes)
 
 #companyNames = set()
 
@@ -58,13 +58,15 @@ def readCompanyRoomNames(doc: str, cursor: SqliteDB):
     cursor.EmptyTable(COMPANY_TABLE)
 
     roomNames = set()
+    companyRooms = []
     for (companyName, roomName) in getCols(doc, 2, True):
         ValidationException.throwIfFalse(
             roomName not in roomNames,
             f"duplicate room name ({roomName})"
         )
         roomNames.add(roomName)
-        AddCompanyRoom(cursor, companyName, roomName)
+        companyRooms.append((companyName, roomName))
+    AddCompanyRooms(cursor, companyRooms)
 
 
 def readRoomInterviews(doc: str, cursor: SqliteDB):
@@ -77,6 +79,7 @@ def readRoomInterviews(doc: str, cursor: SqliteDB):
         roomNames.update(companyRoomNames)
 
     roomNamesWithInterview: set[str] = set()
+    rooms = []
     for roomName, length, startStr, endStr in getCols(doc, 4, False):
         interval = TimeInterval.fromStr(startStr, endStr)
 
@@ -97,7 +100,8 @@ def readRoomInterviews(doc: str, cursor: SqliteDB):
             any(interval.isIntersecting(d) for d in conventionTimes),
             f"invalid interval: break at {interval} does not intersect with interview times: {conventionTimes}"
         )
-        AddRoom(cursor, roomName, int(length), interval)
+        rooms.append((roomName, int(length), interval))
+    AddRooms(cursor, rooms)
 
 
 def readRoomBreaks(doc: str, cursor: SqliteDB):
@@ -112,6 +116,7 @@ def readRoomBreaks(doc: str, cursor: SqliteDB):
         for roomName in roomNames:
             companyRoomBreaks[roomName] = []
 
+    roomBreaks = []
     for roomName, startStr, endStr in getCols(doc, 3, False):
         b = TimeInterval.fromStr(startStr, endStr)
 
@@ -134,7 +139,8 @@ def readRoomBreaks(doc: str, cursor: SqliteDB):
         )
 
         companyRoomBreaks[roomName].append(b)
-        AddRoomBreak(cursor, roomName, b)
+        roomBreaks.append((roomName, b))
+    AddRoomBreaks(cursor, roomBreaks)
 
 
 def readCoffeeChat(doc: str, cursor: SqliteDB):
@@ -145,6 +151,7 @@ def readCoffeeChat(doc: str, cursor: SqliteDB):
     companyRoomNames = GetCompanyRooms(cursor)
 
     coffeeChatRooms: set[str] = set()
+    coffeeChats = []
 
     for roomName, capacity, startStr, endStr in getCols(doc, 4, False):
         timeInt = TimeInterval.fromStr(startStr, endStr)
@@ -167,7 +174,8 @@ def readCoffeeChat(doc: str, cursor: SqliteDB):
         )
 
         coffeeChatRooms.add(roomName)
-        AddCoffeeChat(cursor, roomName, capacity, timeInt)
+        coffeeChats.append((roomName, capacity, timeInt))
+    AddCoffeeChats(cursor, coffeeChats)
 
 
 def readCoffeeChatCandidates(doc: str, cursor: SqliteDB):
@@ -182,6 +190,7 @@ def readCoffeeChatCandidates(doc: str, cursor: SqliteDB):
     for roomName in coffeeChatRooms:
         ccCandidates[roomName] = set()
 
+    ccCandidateRows = []
     for roomName, attendeeId, pref in getCols(doc, 3, True):
         attendeeId = int(attendeeId)
 
@@ -207,7 +216,8 @@ def readCoffeeChatCandidates(doc: str, cursor: SqliteDB):
             f"invalid preference ({pref}), must be a positive integer"
         )
         ccCandidates[roomName].add(attendeeId)
-        AddCoffeeChatCandidate(cursor, roomName, attendeeId, pref)
+        ccCandidateRows.append((roomName, attendeeId, pref))
+    AddCoffeeChatCandidates(cursor, ccCandidateRows)
 
     for room, atts in ccCandidates.items():
         ValidationException.throwIfFalse(
@@ -220,6 +230,7 @@ def readAttendeeNames(doc: str, cursor: SqliteDB):
     cursor.EmptyTable(ATTENDEES_TABLE)
 
     attendeeIDs = set()
+    attendees = []
 
     for (attendeeID, name) in getCols(doc, 2, True):
         ValidationException.throwIfFalse(
@@ -227,7 +238,8 @@ def readAttendeeNames(doc: str, cursor: SqliteDB):
             f"duplicate attendee ID ({attendeeID})"
         )
         attendeeIDs.add(attendeeID)
-        AddAttendee(cursor, attendeeID, name)
+        attendees.append((attendeeID, name))
+    AddAttendees(cursor, attendees)
 
 
 def readAttendeeBreaks(doc: str, cursor: SqliteDB):
@@ -237,6 +249,7 @@ def readAttendeeBreaks(doc: str, cursor: SqliteDB):
     attendeeIDs = GetAttendees(cursor)
 
     attendeeBreaks = {a: [] for a in attendeeIDs}
+    attendeeBreakRows = []
 
     for attendeeID, startStr, endStr in getCols(doc, 3, False):
         attendeeID = int(attendeeID)
@@ -255,7 +268,8 @@ def readAttendeeBreaks(doc: str, cursor: SqliteDB):
             f"invalid break: break at {b} intersects with one of the other breaks {attendeeBreaks[attendeeID]}"
         )
         attendeeBreaks[int(attendeeID)].append(b)
-        AddAttendeeBreak(cursor, attendeeID, b)
+        attendeeBreakRows.append((attendeeID, b))
+    AddAttendeeBreaks(cursor, attendeeBreakRows)
 
 
 def readAttendeePrefs(doc: str, cursor: SqliteDB):
@@ -267,6 +281,7 @@ def readAttendeePrefs(doc: str, cursor: SqliteDB):
     # lowestRank = -float('inf')
     lowestRank = -1
     attendeePreferences = {a: {} for a in attendeeIDs}
+    prefRows = []
     for attendeeID, companyName, pref in getCols(doc, 3, False):
 
         attendeeID = int(attendeeID)
@@ -288,14 +303,11 @@ def readAttendeePrefs(doc: str, cursor: SqliteDB):
         )
         lowestRank = max(lowestRank, int(pref))
         attendeePreferences[attendeeID][companyName] = int(pref)
-        AddAttendeePref(cursor, attendeeID, companyName, pref)
+        prefRows.append((attendeeID, companyName, pref))
+    AddAttendeePrefs(cursor, prefRows)
 
-    unspecifiedRank = lowestRank + 1
-    for companyName in companyNames:
-        for attId, companyPrefs in attendeePreferences.items():
-            if companyName not in companyPrefs:
-                AddAttendeePref(cursor, attId, companyName, unspecifiedRank)
-    # for all attendees, if they havent ranked a company, put them at the lowest rank + 1
+    # for all attendees, if they havent ranked a company, they have the lowest rank + 1
+    SetDefaultAttendeePref(cursor, lowestRank + 1)
 
 
 #roomCandidates = {a: set() for a in roomNames}
@@ -311,6 +323,7 @@ def readInterviewCandidates(doc: str, cursor: SqliteDB):
         for roomName in roomNames:
             roomCandidates[roomName] = set()
 
+    candidateRows = []
     for roomName, attendeeId in getCols(doc, 2, False):
         attendeeId = int(attendeeId)
 
@@ -332,21 +345,22 @@ def readInterviewCandidates(doc: str, cursor: SqliteDB):
             f"duplicate attendee for room candidate ({roomName})"
         )
         roomCandidates[roomName].add(attendeeId)
-        AddInterviewCandidate(cursor, roomName, attendeeId)
+        candidateRows.append((roomName, attendeeId))
+    AddInterviewCandidates(cursor, candidateRows)
 
 
 def getSomeTimes(conventionTimes: list[TimeInterval], mins: int, breaks: list[TimeInterval], interval: TimeInterval) -> list[TimeInterval]:
     times = []
 
     for timeInt in [t for t in conventionTimes if t.isIntersecting(interval)]:
-        startTime = max(timeInt.time, interval.time)  # start time in secs
+        startTime = max(timeInt.time, interval.time)  # start time in mins
         endTime = min(timeInt.end, interval.end)
 
         newTime = startTime
         # loop invariant: $newTimeInt.end <= $endTime
         while True:
             # create a new TimeInterval starting at $newTime, lasting for $mins
-            newTimeInt = TimeInterval(newTime, timedelta(minutes=mins))
+            newTimeInt = TimeInterval(newTime, mins)
 
             # if the new time is out of bounds, stop early
             if endTime < newTimeInt.end:
@@ -369,26 +383,17 @@ def getSomeTimes(conventionTimes: list[TimeInterval], mins: int, breaks: list[Ti
 
 
 def setAttendeeAndCompanies(cursor: SqliteDB, companies: list[Company], attendees: list[Attendee]):
-    conventionTimes = GetConventionTimes(cursor)
-
-    companyRoomNames = GetCompanyRooms(cursor)
-    roomLengths = GetRoomLengths(cursor)
-    roomIntervals = GetRoomIntervals(cursor)
-    roomBreaks = GetRoomBreaks(cursor)
+    """ Build the model in one pass over the rooms (joined with their interview and coffee chat)
+        and one over the attendees, with the other tables read into dicts by their key
+    """
 
+    conventionTimes = GetConventionTimes(cursor)
+    rooms = list(IterateRooms(cursor))
     attendeeIdToName = GetAttendeeNames(cursor)
-    attendeePrefs = GetAttendeePrefs(cursor)
-    attendeeBreaks = GetAttendeeBreaks(cursor)
-
-    interviewCandidates = GetInterviewCandidates(cursor)
-
-    coffeeChatCapacities = GetCoffeeChatCapacities(cursor)
-    coffeeChatTimes = GetCoffeeChatTimes(cursor)
-    coffeeChatCandidates = GetCoffeeChatCandidates(cursor)
 
     mandatoryTables = [
         (conventionTimes, 'Convention Times'),
-        (companyRoomNames, 'Company Rooms'),
+        (rooms, 'Company Rooms'),
         (attendeeIdToName, 'Attendees')
     ]
 
@@ -398,48 +403,59 @@ def setAttendeeAndCompanies(cursor: SqliteDB, companies: list[Company], attendee
             f'a mandatory table ({tableName}) is empty'
         )
 
-    companyNameToCompany = {name: Company(name)
-                            for name in companyRoomNames.keys()}
-    for company in companyNameToCompany.values():
-        companies.append(company)
+    companyNameToCompany = {}
+    for companyName, *_ in rooms:
+        if companyName not in companyNameToCompany:
+            company = Company(companyName, len(companies))
+            companyNameToCompany[companyName] = company
+            companies.append(company)
+
+    attendeePrefs = GetAttendeePrefs(cursor)
+    defaultPref = GetDefaultAttendeePref(cursor)
+    attendeeBreaks = GetAttendeeBreaks(cursor)
 
     attendeeIDToAttendee = {}
     for attId, name in attendeeIdToName.items():
-        prefs = []
-        for companyName in companyNameToCompany:
-            pref = attendeePrefs.get(attId, {}).get(companyName, 0)
-            prefs.append(CompanyPreference(
-                companyNameToCompany[companyName], pref))
-
-        att = Attendee(attId, name, prefs, attendeeBreaks.get(attId, []))
+        prefs = [
+            CompanyPreference(companyNameToCompany[companyName], pref)
+            for companyName, pref in attendeePrefs.get(attId, {}).items()
+        ]
+
+        att = Attendee(
+            attId, 
+            name, 
+            prefs, 
+            attendeeBreaks.get(attId, []), 
+            defaultPref if defaultPref is not None else 0
+        )
         attendeeIDToAttendee[attId] = att
         attendees.append(att)
 
-    for companyName, roomNames in companyRoomNames.items():
-        for roomName in roomNames:
-            company = companyNameToCompany[companyName]
-            interval = roomIntervals.get(roomName, None)
-            breaks = roomBreaks.get(roomName, [])
-
-            # if we have a coffeeChat, don't generate an appointment at that time
-            if roomName in coffeeChatTimes:
-                breaks.append(coffeeChatTimes[roomName])
-
-            times = getSomeTimes(
-                conventionTimes, roomLengths[roomName], breaks, interval) if interval is not None else []
-            room = company.addCompanyRoom(
-                roomName,
-                times,
+    roomBreaks = GetRoomBreaks(cursor)
+    interviewCandidates = GetInterviewCandidates(cursor)
+    coffeeChatCandidates = GetCoffeeChatCandidates(cursor)
+
+    for companyName, roomName, length, interval, capacity, coffeeChatTime in rooms:
+        breaks = roomBreaks.get(roomName, [])
+
+        # if we have a coffeeChat, don't generate an appointment at that time
+        if coffeeChatTime is not None:
+            breaks.append(coffeeChatTime)
+
+        times = getSomeTimes(conventionTimes, length, breaks, interval) if interval is not None else []
+        room = companyNameToCompany[companyName].addCompanyRoom(
+            roomName,
+            times,
+            [attendeeIDToAttendee[attId]
+                for attId in interviewCandidates.get(roomName, [])]
+        )
+        if coffeeChatTime is not None:
+            room.setCoffeeChat(
+                capacity,
+                coffeeChatTime,
                 [attendeeIDToAttendee[attId]
-                    for attId in interviewCandidates.get(roomName, [])]
+                    for attId in coffeeChatCandidates.get(roomName, [])]
             )
-            if roomName in coffeeChatTimes:
-                room.setCoffeeChat(
-                    coffeeChatCapacities[roomName],
-                    coffeeChatTimes[roomName],
-                    [attendeeIDToAttendee[attId]
-                        for attId in coffeeChatCandidates[roomName]]
-                )
 
 
 def tryToReadTable(cursor: SqliteDB, readFunc: Callable[[str, SqliteDB], None], tableName: str):
@@ -0,0 +1,141 @@
+from __future__ import annotations
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from threading import Condition, Lock
+from time import monotonic
+from typing import Any, Callable, Iterator, Optional
+from uuid import uuid4
+
+from serverUtilities import QueueFullException, ValidationException
+
+class ScheduleJob:
+    """ A schedule generation queued on a ScheduleJobQueue, with the progress events of its run """
+
+    def __init__(self, params: dict[str, Any]):
+        self.id = uuid4().hex
+        self.params = params
+        self.status = 'queued' # queued -> running -> done | failed
+        self.phase: Optional[str] = None
+        self.totalUtility: Optional[int] = None
+        self.noAppointmentsNotEmpty: Optional[int] = None
+        self.result: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.finishedAt: Optional[float] = None # time.monotonic() once finished
+        self.events: list[dict] = []
+        self.condition = Condition()
+
+    def isFinished(self) -> bool:
+        return self.status in ('done', 'failed')
+
+    def addEvent(self, event: dict):
+        """ Record a progress event of run(), or a status change """
+
+        with self.condition:
+            if event['type'] == 'phaseStart':
+                self.phase = event['name']
+            for key in ('totalUtility', 'noAppointmentsNotEmpty'):
+                if key in event:
+                    setattr(self, key, event[key])
+            self.events.append(event)
+            self.condition.notify_all()
+
+    def setStatus(self, status: str, result: Optional[dict] = None, error: Optional[str] = None):
+        with self.condition:
+            if status in ('done', 'failed'):
+                self.finishedAt = monotonic() # before the status, removeFinishedJobs doesn't take the condition
+            self.status = status
+            self.result = result
+            self.error = error
+            self.addEvent({'type': 'status', 'status': status, 'error': error})
+
+    def iterEvents(self, timeout: float = 15) -> Iterator[Optional[dict]]:
+        """ Every event, from the first one until the job is finished,
+            None every $timeout seconds without events
+        """
+
+        i = 0
+        while True:
+            with self.condition:
+                if i == len(self.events) and not self.isFinished():
+                    self.condition.wait(timeout)
+                events = self.events[i:]
+                isFinished = self.isFinished()
+            i += len(events)
+
+            if not events:
+                yield None
+            yield from events
+            if isFinished:
+                return
+
+    def toJson(self) -> dict:
+        with self.condition:
+            return {
+                'id': self.id,
+                'status': self.status,
+                'phase': self.phase,
+                'totalUtility': self.totalUtility,
+                'noAppointmentsNotEmpty': self.noAppointmentsNotEmpty,
+                'error': self.error,
+                **({'data': self.result} if self.status == 'done' else {})
+            }
+
+
+class ScheduleJobQueue:
+    """ Runs jobs one at a time on a background thread, in the order they were submitted
+
+        At most $maxQueuedJobs jobs wait to run, submit raises a QueueFullException past that.
+        Finished jobs are kept for $finishedJobTtl seconds, and at most $maxFinishedJobs of them.
+    """
+
+    def __init__(
+            self, 
+            runJob: Callable[[ScheduleJob], dict], 
+            maxQueuedJobs: int = 8, 
+            maxFinishedJobs: int = 100, 
+            finishedJobTtl: float = 3600
+        ):
+        self.runJob = runJob
+        self.maxQueuedJobs = maxQueuedJobs
+        self.maxFinishedJobs = maxFinishedJobs
+        self.finishedJobTtl = finishedJobTtl
+        self.jobs: dict[str, ScheduleJob] = {} # in the order they were submitted
+        self.lock = Lock()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def submit(self, params: dict[str, Any]) -> ScheduleJob:
+        job = ScheduleJob(params)
+        with self.lock:
+            noQueued = sum(1 for queued in self.jobs.values() if queued.status == 'queued')
+            if noQueued >= self.maxQueuedJobs:
+                raise QueueFullException(f'{noQueued} jobs are already queued, try again once some are done')
+            self.jobs[job.id] = job
+            self.removeFinishedJobs()
+        self.executor.submit(self.run, job)
+        return job
+
+    def removeFinishedJobs(self):
+        # the jobs finished for longer than the ttl are dropped, and the oldest ones once there are too many
+        finished = [job for job in self.jobs.values() if job.isFinished()]
+        expiredBefore = monotonic() - self.finishedJobTtl
+        expired = [job for job in finished if job.finishedAt < expiredBefore]
+        kept = [job for job in finished if job.finishedAt >= expiredBefore]
+        for job in expired + kept[:max(0, len(kept) - self.maxFinishedJobs)]:
+            del self.jobs[job.id]
+
+    def get(self, jobId: str) -> Optional[ScheduleJob]:
+        with self.lock:
+            self.removeFinishedJobs()
+            return self.jobs.get(jobId)
+
+    def run(self, job: ScheduleJob):
+        job.setStatus('running')
+        try:
+            job.setStatus('done', result=self.runJob(job))
+        except ValidationException as e:
+            job.setStatus('failed', error=str(e))
+        except Exception as e:
+            traceback.print_exc()
+            job.setStatus('failed', error=f"Server Error: {str(type(e))} -- {str(e)}")
+        with self.lock:
+            self.removeFinishedJobs()
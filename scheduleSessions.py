@@ -0,0 +1,182 @@
+from __future__ import annotations
+import json
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Optional
+from uuid import uuid4
+
+from serverUtilities import Appointment, AppointmentIntersects, Attendee, Company, ConflictException, TimeInterval, getJsonMetrics, getJsonSchedule, swapBoth
+from parseSchedule import getAppointmentIndex, parseJsonSchedule, parseJsonSwap
+from trySwap import throwIfCantSwap
+from SqliteLib import SqliteDB
+from Schema import (
+    AddScheduleSession,
+    AddScheduleSessionSwap,
+    GetScheduleSession,
+    RemoveOldScheduleSessions,
+    RemoveScheduleSession,
+    ScheduleSessionExists,
+)
+
+class ScheduleSession:
+    """ A live schedule model that swaps are made against, without parsing the schedule again
+
+        $version counts the swaps made since the session was created.
+        The session is persisted as the schedule at $persistedVersion and the swaps made since then.
+    """
+
+    def __init__(self, sessionId: str, companies: list[Company], attendees: list[Attendee], conventionTimes: list[TimeInterval], version: int = 0):
+        self.id = sessionId
+        self.companies = companies
+        self.attendees = attendees
+        self.conventionTimes = conventionTimes
+        self.version = version
+        self.persistedVersion = version
+        self.appIntersects = AppointmentIntersects(companies)
+        self.attendeeIdToAttendee = {att.uid: att for att in attendees}
+        self.appIndex = getAppointmentIndex(companies)
+        self.lock = Lock()
+
+    def swap(
+            self, 
+            swapJson: dict, 
+            cursor: Optional[SqliteDB] = None, 
+            expectedVersion: Optional[int] = None
+        ) -> tuple[Optional[Appointment], Optional[Appointment]]:
+        """ Swap the apps and atts of $swapJson (as in parseJsonSwap), return the two apps
+
+            The swap is persisted and committed with $cursor if given,
+            the model only changes once it is, so it never gets ahead of the database.
+            Raises a ConflictException if $expectedVersion is given and isn't the current version.
+        """
+
+        with self.lock:
+            if expectedVersion is not None and expectedVersion != self.version:
+                raise ConflictException(
+                    f'schedule changed: expected version {expectedVersion}, the current version is {self.version}'
+                )
+            app1, att1, app2, att2 = parseJsonSwap(swapJson, self.attendeeIdToAttendee, self.appIndex)
+            throwIfCantSwap(app1, att1, app2, att2, self.appIntersects)
+            if cursor is not None:
+                # persist first so a failed insert or commit leaves the model unchanged
+                AddScheduleSessionSwap(cursor, self.id, self.version + 1, json.dumps(swapJson))
+                cursor.Commit()
+            swapBoth(app1, att1, app2, att2, self.appIntersects)
+            self.version += 1
+            return app1, app2
+
+    def compact(self, cursor: SqliteDB):
+        """ Replace the persisted schedule and swaps by the current schedule """
+
+        with self.lock:
+            if self.version == self.persistedVersion:
+                return
+            RemoveScheduleSession(cursor, self.id)
+            AddScheduleSession(cursor, self.id, self.version, json.dumps(self.getSchedule()))
+            self.persistedVersion = self.version
+
+    def getSchedule(self, getScheduleJson: Callable[..., dict] = getJsonSchedule) -> dict:
+        """ The schedule as returned by $getScheduleJson, getJsonSchedule or getCompactSchedule """
+
+        return getScheduleJson(
+            self.companies,
+            self.attendees,
+            self.conventionTimes,
+            self.appIntersects.metrics
+        )
+
+    def getDeltaJson(self, apps: list[Optional[Appointment]]) -> dict:
+        """ The changed $apps and the metrics, for patching a schedule of the previous version
+
+            Each app is its toJson with its company and its index in the room's apps.
+        """
+
+        with self.lock:
+            return {
+                'sessionId': self.id,
+                'version': self.version,
+                'apps': [
+                    {
+                        'company': app.company.name,
+                        'index': app.companyRoom.appointments.index(app),
+                        **app.toJson()
+                    }
+                    for app in apps if app is not None
+                ],
+                **getJsonMetrics(self.appIntersects.metrics)
+            }
+
+    def toJson(self, getScheduleJson: Callable[..., dict] = getJsonSchedule) -> dict:
+        with self.lock:
+            return {
+                **self.getSchedule(getScheduleJson),
+                'sessionId': self.id,
+                'version': self.version
+            }
+
+
+class ScheduleSessionStore:
+    """ The $maxSessions most recently used sessions, the others are loaded from the database when used
+
+        Evicted sessions are compacted, at most $maxPersistedSessions sessions are kept in the database
+        besides the ones in memory.
+    """
+
+    def __init__(self, maxSessions: int = 8, maxPersistedSessions: int = 100):
+        self.maxSessions = maxSessions
+        self.maxPersistedSessions = maxPersistedSessions
+        self.sessions: OrderedDict[str, ScheduleSession] = OrderedDict() # least recently used first
+        self.lock = Lock()
+
+    def create(
+            self, 
+            cursor: SqliteDB, 
+            companies: list[Company], 
+            attendees: list[Attendee], 
+            conventionTimes: list[TimeInterval], 
+            schedule: Optional[dict] = None
+        ) -> ScheduleSession:
+        """ A new session of the model, $schedule is its getJsonSchedule if already computed """
+
+        session = ScheduleSession(uuid4().hex, companies, attendees, conventionTimes)
+        AddScheduleSession(cursor, session.id, session.version, json.dumps(schedule or session.getSchedule()))
+        with self.lock:
+            self.add(cursor, session)
+            RemoveOldScheduleSessions(cursor, self.maxPersistedSessions, self.sessions.keys())
+        return session
+
+    def get(self, cursor: SqliteDB, sessionId: str) -> Optional[ScheduleSession]:
+        with self.lock:
+            session = self.sessions.get(sessionId)
+            if session is not None:
+                if not ScheduleSessionExists(cursor, sessionId):
+                    # removed from the database (by another server or a reset), its swaps can't be persisted
+                    del self.sessions[sessionId]
+                    return None
+                self.sessions.move_to_end(sessionId)
+                return session
+
+            session = self.load(cursor, sessionId)
+            if session is not None:
+                self.add(cursor, session)
+            return session
+
+    def add(self, cursor: SqliteDB, session: ScheduleSession):
+        self.sessions[session.id] = session
+        while len(self.sessions) > self.maxSessions:
+            _, evicted = self.sessions.popitem(last=False)
+            evicted.compact(cursor)
+
+    @staticmethod
+    def load(cursor: SqliteDB, sessionId: str) -> Optional[ScheduleSession]:
+        """ The persisted schedule of the session with its swaps replayed """
+
+        persisted = GetScheduleSession(cursor, sessionId)
+        if persisted is None:
+            return None
+
+        version, schedule, swaps = persisted
+        session = ScheduleSession(sessionId, *parseJsonSchedule(json.loads(schedule)), version)
+        for swap in swaps:
+            session.swap(json.loads(swap))
+        return session
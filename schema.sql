@@ -18,6 +18,7 @@ CREATE TABLE IF NOT EXISTS companyRoom(
 	PRIMARY KEY (roomName),
 	FOREIGN KEY (companyName) REFERENCES company(companyName) ON DELETE CASCADE
 );
+CREATE INDEX IF NOT EXISTS companyRoom_companyName_index ON companyRoom(companyName);
 
 CREATE TABLE IF NOT EXISTS roomInterview(
 	timestamp INTEGER  NOT NULL,
@@ -73,6 +74,13 @@ CREATE TABLE IF NOT EXISTS attendeePreference(
 	FOREIGN KEY (attendeeID) REFERENCES attendee(attendeeID) ON DELETE CASCADE,
 	FOREIGN KEY (companyName) REFERENCES company(companyName) ON DELETE CASCADE
 );
+CREATE INDEX IF NOT EXISTS attendeePreference_companyName_index ON attendeePreference(companyName);
+
+CREATE TABLE IF NOT EXISTS attendeePreferenceDefault(
+	timestamp INTEGER  NOT NULL,
+	preference INTEGER  NOT NULL,
+	PRIMARY KEY (preference)
+);
 
 CREATE TABLE IF NOT EXISTS interviewCandidate(
 	timestamp INTEGER  NOT NULL,
@@ -82,6 +90,7 @@ CREATE TABLE IF NOT EXISTS interviewCandidate(
 	FOREIGN KEY (roomName) REFERENCES companyRoom(roomName) ON DELETE CASCADE,
 	FOREIGN KEY (attendeeID) REFERENCES attendee(attendeeID) ON DELETE CASCADE
 );
+CREATE INDEX IF NOT EXISTS interviewCandidate_attendeeID_index ON interviewCandidate(attendeeID);
 
 CREATE TABLE IF NOT EXISTS coffeeChatCandidate(
 	timestamp INTEGER  NOT NULL,
@@ -91,4 +100,22 @@ CREATE TABLE IF NOT EXISTS coffeeChatCandidate(
 	PRIMARY KEY (roomName, attendeeID),
 	FOREIGN KEY (roomName) REFERENCES companyRoom(roomName) ON DELETE CASCADE,
 	FOREIGN KEY (attendeeID) REFERENCES attendee(attendeeID) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS coffeeChatCandidate_attendeeID_index ON coffeeChatCandidate(attendeeID);
+
+CREATE TABLE IF NOT EXISTS scheduleSession(
+	timestamp INTEGER  NOT NULL,
+	sessionID VARCHAR(32)  NOT NULL,
+	version INTEGER  NOT NULL,
+	schedule TEXT  NOT NULL,
+	PRIMARY KEY (sessionID)
+);
+
+CREATE TABLE IF NOT EXISTS scheduleSessionSwap(
+	timestamp INTEGER  NOT NULL,
+	sessionID VARCHAR(32)  NOT NULL,
+	version INTEGER  NOT NULL,
+	swap TEXT  NOT NULL,
+	PRIMARY KEY (sessionID, version),
+	FOREIGN KEY (sessionID) REFERENCES scheduleSession(sessionID) ON DELETE CASCADE
 );
\ No newline at end of file
@@ -1,6 +1,11 @@
 from __future__ import annotations
+from array import array
 from datetime import datetime, timedelta
 from typing import Any, Optional
+from bisect import bisect_left, bisect_right
+from heapq import heappop, heappush
+from math import gcd
+from time import monotonic
 
 EXCEL_DATETIME_FORMAT = '%Y-%m-%d %H:%M:00'
 BAD_UTILITY = 1000
@@ -12,16 +17,41 @@ class ValidationException(Exception):
         if not cond:
             raise ValidationException(msg)
 
-def timesIntersect(time1: datetime, length1: timedelta, time2: datetime, length2: timedelta):
+class ConflictException(ValidationException):
+    """ The request was made against an outdated version of the data """
+
+class QueueFullException(ValidationException):
+    """ The request can't be queued until some of the work queued before it is done """
+
+def timesIntersect(time1: int, length1: int, time2: int, length2: int):
     latestStart = max(time1, time2)
     earliestEnd = min(time1 + length1, time2 + length2)
     return latestStart < earliestEnd
 
-TimeIntervalHash = tuple[datetime, datetime]
+def isPastDeadline(deadline: Optional[float]) -> bool:
+    """ $deadline is a time.monotonic() timestamp, None for no deadline """
+    return deadline is not None and monotonic() >= deadline
+
+EPOCH = datetime(1970, 1, 1)
+ONE_MINUTE = timedelta(minutes=1)
+
+def toMinutes(dt: datetime) -> int:
+    """ Minutes since the epoch, the time representation used by the scheduling model
+
+        The model is in naive local times, an aware $dt counts by its wall time (its offset is dropped).
+    """
+    return (dt.replace(tzinfo=None) - EPOCH) // ONE_MINUTE
+
+def fromMinutes(minutes: int) -> datetime:
+    return EPOCH + minutes * ONE_MINUTE
+
+TimeIntervalHash = tuple[int, int]
 
 class TimeInterval:
+    """ Half open interval [time, end), in minutes since the epoch """
+    __slots__ = ('time', 'length', 'end', 'timeHash')
 
-    def __init__(self, time: datetime, length: timedelta):
+    def __init__(self, time: int, length: int):
         self.time = time
         self.length = length
         self.end = self.time + self.length
@@ -29,17 +59,29 @@ class TimeInterval:
         assert self.time < self.end
 
     def isIntersecting(self, timeInterval: TimeInterval) -> bool:
-        return timesIntersect(self.time, self.length, timeInterval.time, timeInterval.length)
+        return self.time < timeInterval.end and timeInterval.time < self.end
 
     def contains(self, timeInterval: TimeInterval) -> bool:
         return self.time <= timeInterval.time and timeInterval.end <= self.end
 
+    def getStartDatetime(self) -> datetime:
+        return fromMinutes(self.time)
+
+    def getEndDatetime(self) -> datetime:
+        return fromMinutes(self.end)
+
     def __repr__(self) -> str:
+        start, end = self.getStartDatetime(), self.getEndDatetime()
         return (
-            f"{self.time.strftime('%b %d')}: "
-            + f"[{self.time.strftime('%H:%M')},{(self.length + self.time).strftime('%H:%M')}]"
+            f"{start.strftime('%b %d')}: "
+            + f"[{start.strftime('%H:%M')},{end.strftime('%H:%M')}]"
         )
 
+    @staticmethod
+    def fromDatetimes(start: datetime, end: datetime) -> TimeInterval:
+        startMins = toMinutes(start)
+        return TimeInterval(startMins, toMinutes(end) - startMins)
+
     @staticmethod
     def fromStr(startStr: str, endStr: str) -> TimeInterval:
         try:
@@ -47,22 +89,73 @@ class TimeInterval:
         except ValueError:
             raise ValidationException(f"invalid iso format dates: '{startStr}' and '{endStr}'")
         ValidationException.throwIfFalse(
-            d1 < d2,
+            (d1.tzinfo is None) == (d2.tzinfo is None),
+            f"invalid dates: '{startStr}' and '{endStr}' must both have a utc offset or both have none"
+        )
+        ValidationException.throwIfFalse(
+            all(d.second == 0 and d.microsecond == 0 for d in (d1, d2)),
+            f"invalid dates: '{startStr}' and '{endStr}' must be whole minutes"
+        )
+        # compared as the model sees them, by wall time (see toMinutes)
+        start, end = toMinutes(d1), toMinutes(d2)
+        ValidationException.throwIfFalse(
+            start < end,
             f"invalid dates: start date ({d1}) is not smaller than end date ({d2})"
         )
-        return TimeInterval(d1, d2-d1)    
+        return TimeInterval(start, end - start)
 
     def toJson(self) -> dict:
-        return {'start': self.time.isoformat(), 'end': self.end.isoformat()}    
+        return {'start': self.getStartDatetime().isoformat(), 'end': self.getEndDatetime().isoformat()}
+
+
+class SlotGrid:
+    """ Split time into equal slots s.t. every boundary of $intervals is a slot boundary """
+
+    def __init__(self, intervals: list[TimeInterval]):
+        self.origin = min((t.time for t in intervals), default=None)
+        if self.origin is None:
+            self.slotLength = 1
+            self.noSlots = 0
+            return
+
+        offsets = [
+            time - self.origin
+            for t in intervals
+            for time in (t.time, t.end)
+        ]
+        self.slotLength = gcd(*offsets)
+        self.noSlots = max(offsets) // self.slotLength
+
+    def getSlotRange(self, timeInterval: TimeInterval) -> tuple[int, int]:
+        """ [first, last) slots $timeInterval touches, empty if last <= first """
+
+        if self.noSlots == 0:
+            return 0, 0
+        # round outwards, so intervals which aren't on the grid (eg: commitments)
+        #   still intersect exactly the grid-aligned intervals they used to
+        first = max(0, (timeInterval.time - self.origin) // self.slotLength)
+        last = min(self.noSlots, -((self.origin - timeInterval.end) // self.slotLength))
+        return first, last
+
+    def getMask(self, timeInterval: TimeInterval) -> int:
+        """ Bitmask of every slot $timeInterval touches """
+
+        first, last = self.getSlotRange(timeInterval)
+        if last <= first:
+            return 0
+        return ((1 << (last - first)) - 1) << first
 
 
 class Company:
 
-    def __init__(self, name: str):
+    def __init__(self, name: str, ordinal: int):
         self.name = name
+        self.ordinal = ordinal # index into every attendee's prefs
         self.rooms: list[CompanyRoom] = []
+        self.attendeeToApps: dict[tuple[Attendee, bool], set[Appointment]] = {}
+            # (attendee, isCoffeeChat) -> apps with that attendee, kept in sync by app.setAttendee
 
-    def addCompanyRoom(self, name: str, times: list[datetime], candidates: set[Attendee]) -> CompanyRoom:
+    def addCompanyRoom(self, name: str, times: list[TimeInterval], candidates: set[Attendee]) -> CompanyRoom:
         room = CompanyRoom(name, self, times, candidates)
         self.rooms.append(room)
         return room
@@ -70,13 +163,26 @@ class Company:
     def wantsAttendee(self, attendee: Attendee, isCoffeeChat: bool) -> bool:
         return any(room.wantsAttendee(attendee, isCoffeeChat) for room in self.rooms)
 
+    def getAppointmentsFor(self, attendee: Optional[Attendee], isCoffeeChat: bool) -> set[Appointment]:
+        return self.attendeeToApps.get((attendee, isCoffeeChat), set())
+
     def getAppointmentFor(self, attendee: Optional[Attendee], appToIgnore: Appointment, isCoffeeChat: bool) -> Optional[Appointment]:
-        for room in self.rooms:
-            app = room.getAppointmentFor(attendee, appToIgnore, isCoffeeChat)
-            if app is not None:
-                return app
+        if attendee:
+            for app in self.getAppointmentsFor(attendee, isCoffeeChat):
+                if app != appToIgnore:
+                    return app
         return None
 
+    def updateAttendee(self, app: Appointment, oldAtt: Optional[Attendee], newAtt: Optional[Attendee]):
+        if oldAtt is not None:
+            key = (oldAtt, app.isCoffeeChat())
+            apps = self.attendeeToApps[key]
+            apps.remove(app)
+            if not apps:
+                del self.attendeeToApps[key]
+        if newAtt is not None:
+            self.attendeeToApps.setdefault((newAtt, app.isCoffeeChat()), set()).add(app)
+
     def hasAttendee(self, attendee: Attendee, appToIgnore: Appointment, isCoffeeChat: bool) -> bool:
         return self.getAppointmentFor(attendee, appToIgnore, isCoffeeChat) is not None
 
@@ -97,22 +203,98 @@ class AppointmentIntersects:
     def __init__(self, companies: list[Company]):
         self.appsAtTime = self.getAppsAtTimes(companies)
 
+        self.metrics = ScheduleMetrics(companies)
+
+        # slot occupancy bitmasks, s.t. two intervals intersect iff their masks do
+        apps = [app for c in companies for app in c.getAppointments()]
+        self.slotGrid = SlotGrid(apps)
+        self.appToMask: dict[Appointment, int] = {app: self.slotGrid.getMask(app) for app in apps}
+        self.attToBusyMask: dict[Attendee, int] = {}
+        self.attToApps: dict[Attendee, set[Appointment]] = {}
+        self.attToAppsMask: dict[Attendee, int] = {}
+        for app in apps:
+            if not app.isEmpty():
+                self.addAttendeeApp(app.attendee, app)
+
+    def addAttendeeApp(self, att: Attendee, app: Appointment):
+        self.attToApps.setdefault(att, set()).add(app)
+        self.attToAppsMask[att] = self.attToAppsMask.get(att, 0) | self.appToMask[app]
+
+    def removeAttendeeApp(self, att: Attendee, app: Appointment):
+        apps = self.attToApps[att]
+        apps.remove(app)
+        mask = 0
+        for app2 in apps:
+            mask |= self.appToMask[app2]
+        self.attToAppsMask[att] = mask
+
+    def updateAttendee(self, app: Appointment, oldAtt: Optional[Attendee], newAtt: Optional[Attendee]):
+        """ Keep the occupancy masks and metrics in sync, call whenever $app.attendee changes """
+
+        if oldAtt is not None:
+            self.removeAttendeeApp(oldAtt, app)
+        if newAtt is not None:
+            self.addAttendeeApp(newAtt, app)
+        self.metrics.updateAttendee(app, oldAtt, newAtt)
+
+    def getBusyMask(self, att: Attendee) -> int:
+        mask = self.attToBusyMask.get(att)
+        if mask is None:
+            mask = 0
+            for commit in att.commitments:
+                mask |= self.slotGrid.getMask(commit)
+            self.attToBusyMask[att] = mask
+        return mask
+
+    def isBusy(self, att: Attendee, app: Appointment) -> bool:
+        return (self.getBusyMask(att) & self.appToMask[app]) != 0
+
+    @staticmethod
+    def splitIntoDays(apps: list[Appointment]) -> list[list[Appointment]]:
+        # apps must be sorted by start time,
+        #   a new day starts whenever an app starts after every previous app has ended
+        days = []
+        dayEnd = None
+        for app in apps:
+            if dayEnd is None or dayEnd <= app.time:
+                days.append([])
+                dayEnd = app.end
+            days[-1].append(app)
+            dayEnd = max(dayEnd, app.end)
+        return days
+
     @staticmethod
     def getAppsAtTimes(companies: list[Company]) -> dict[TimeIntervalHash, set[Appointment]]:
+        # sweep line: an app overlaps the interval [start, end) iff
+        #   it started before $start and is still running at $start,
+        #   or it starts somewhere in [start, end)
 
-        def getAppsAtTime(app: Appointment) -> set[Appointment]:
-            overlapping = set()
-            for c in companies:
-                for app2 in c.getAppointments():
-                    if app.isIntersecting(app2):
-                        overlapping.add(app2)
-            return overlapping
+        apps = sorted(
+            (app for c in companies for app in c.getAppointments()),
+            key=lambda app: app.timeHash
+        )
 
         appsAtTime = {}
-        for c in companies:
-            for app in c.getAppointments():
-                if app.timeHash not in appsAtTime:
-                    appsAtTime[app.timeHash] = getAppsAtTime(app)
+        for dayApps in AppointmentIntersects.splitIntoDays(apps):
+            starts = [app.time for app in dayApps]
+            running: list[tuple[int, int]] = [] # heap of (end, index into dayApps)
+            i = 0
+
+            for timeHash in sorted(set(app.timeHash for app in dayApps)):
+                start, end = timeHash
+
+                # loop invariant: $running holds every app starting before $start
+                #   that hasn't ended by $start
+                while i < len(dayApps) and dayApps[i].time < start:
+                    heappush(running, (dayApps[i].end, i))
+                    i += 1
+                while running and running[0][0] <= start:
+                    heappop(running)
+
+                overlapping = {dayApps[j] for _, j in running}
+                overlapping.update(dayApps[i:bisect_left(starts, end, lo=i)])
+                appsAtTime[timeHash] = overlapping
+
         return appsAtTime
 
     def getOtherAppsAtTime(self, app):
@@ -121,21 +303,33 @@ class AppointmentIntersects:
 
     def getOtherAppAtTime(self, att: Attendee, app: Appointment) -> Optional[Appointment]:
         if att:
-            for app2 in self.getOtherAppsAtTime(app):
-                if app2 != app and app2.isAttendee(att):
+            mask = self.appToMask[app]
+            for app2 in self.attToApps.get(att, ()):
+                if app2 != app and self.appToMask[app2] & mask:
                     return app2
         return None
 
     def hasOtherAppsAtTime(self, att: Attendee, app: Appointment) -> bool:
+        if not att:
+            return False
+        apps = self.attToApps.get(att)
+        if not apps:
+            return False
+        if app not in apps:
+            return (self.attToAppsMask[att] & self.appToMask[app]) != 0
         return self.getOtherAppAtTime(att, app) is not None
 
 
 class CoffeeChat(TimeInterval):
+    __slots__ = ('capacity', 'candidates', 'candidateRanks', 'room')
+
     def __init__(self, capacity: int, timeInt: TimeInterval, orderedCandidates: list[Attendee], room: CompanyRoom):
         super().__init__(timeInt.time, timeInt.length)
         self.capacity = capacity
         self.candidates = orderedCandidates
-        self.candidatesSet = set(orderedCandidates)
+        self.candidateRanks: dict[Attendee, int] = {}
+        for i, att in enumerate(orderedCandidates):
+            self.candidateRanks.setdefault(att, i + 1)
         self.room = room
         for _ in range(capacity):
             room.appointments.append(
@@ -144,14 +338,14 @@ class CoffeeChat(TimeInterval):
         room.appointments.sort(key=lambda a: a.time)
 
     def wantsAttendee(self, attendee: Attendee) -> bool:
-        return attendee is None or attendee in self.candidatesSet 
+        return attendee is None or attendee in self.candidateRanks
 
     def hasAttendee(self, attendee: Attendee) -> bool:
         return attendee in self.attendees
 
     def companyPref(self, att: Attendee):
-        assert att in self.candidatesSet
-        return self.candidates.index(att) + 1
+        assert att in self.candidateRanks
+        return self.candidateRanks[att]
 
     def toJson(self) -> dict:
         return {
@@ -166,7 +360,7 @@ class CompanyRoom:
         self, 
         name: str, 
         company: Company, 
-        times: list[datetime], 
+        times: list[TimeInterval], 
         candidates: set[Attendee]
      ):
         self.name = name
@@ -183,14 +377,16 @@ class CompanyRoom:
             return False
         elif attendee is None:
             return True
-        return attendee in (self.coffeeChat.candidates if isCoffeeChat else self.candidates)
+        elif isCoffeeChat:
+            return self.coffeeChat.wantsAttendee(attendee)
+        return attendee in self.candidates
 
     def getAppointmentFor(self, attendee: Optional[Attendee], appToIgnore: Appointment, isCoffeeChat: bool) -> Optional[Appointment]:
         # app to ignore is an app that shouldn't be included in the appointment search,
         #   enables swapping between two apps in the same company/room
         if attendee:
-            for app in self.appointments:
-                if app.isAttendee(attendee) and app.isCoffeeChat() == isCoffeeChat and app != appToIgnore:
+            for app in self.company.getAppointmentsFor(attendee, isCoffeeChat):
+                if app.companyRoom == self and app != appToIgnore:
                     return app
         return None
 
@@ -212,15 +408,16 @@ class CompanyRoom:
         }
             
 class Appointment(TimeInterval):
+    __slots__ = ('companyRoom', 'company', 'attendee')
 
-    def __init__(self, companyRoom: Company, time: datetime, length: timedelta):
+    def __init__(self, companyRoom: Company, time: int, length: int):
         super().__init__(time, length)
         self.companyRoom: CompanyRoom = companyRoom
         self.company: Company = self.companyRoom.company
         self.attendee: Optional[Attendee] = None
 
     def __repr__(self):
-        return f"{self.companyRoom.name}@{self.time.strftime('%b %d %H:%M')}"
+        return f"{self.companyRoom.name}@{self.getStartDatetime().strftime('%b %d %H:%M')}"
 
     def isCoffeeChat(self) -> bool:
         raise NotImplementedError()
@@ -231,11 +428,14 @@ class Appointment(TimeInterval):
     def isEmpty(self) -> bool:
         return self.attendee == None
 
-    # virtual method
     def getSelfUtility(self):
         if self.isEmpty():
             raise Exception("shouldn't call app.getSelfUtility() on an empty app")
-        return self.attendee.getPref(self.company)
+        return self.getRank(self.attendee)
+
+    # virtual method
+    def getRank(self, att: Attendee) -> int:
+        return att.getPref(self.company)
 
     """
     # virtual method
@@ -275,16 +475,23 @@ class Appointment(TimeInterval):
         return attendee is None or (
             self.companyRoom.wantsAttendee(attendee, self.isCoffeeChat()) 
             and not appIntersects.hasOtherAppsAtTime(attendee, self)
-            and not attendee.isBusy(self)
+            and not appIntersects.isBusy(attendee, self)
             and not self.company.hasAttendee(attendee, appToIgnore, self.isCoffeeChat())
         )
 
     def swap(self, attendee: Attendee, appIntersects: AppointmentIntersects, appToIgnore: Appointment):
         if self.canSwap(attendee, appIntersects, appToIgnore):
-            self.attendee = attendee
+            appIntersects.updateAttendee(self, self.attendee, attendee)
+            self.setAttendee(attendee)
         else:
             raise Exception('tried to swap an attendee which can\'t be swapped')
 
+    def setAttendee(self, attendee: Optional[Attendee]):
+        """ Set attendee without validation, keeping the company's attendee index in sync """
+
+        self.company.updateAttendee(self, self.attendee, attendee)
+        self.attendee = attendee
+
     def toJson(self) -> dict:
         return {
             'room': self.companyRoom.name,
@@ -294,22 +501,22 @@ class Appointment(TimeInterval):
         }
 
 class InterviewAppointment(Appointment):
+    __slots__ = ()
 
     # @override
     def isCoffeeChat(self) -> bool:
         return False
 
 class CoffeeChatAppointment(Appointment):
+    __slots__ = ()
 
     # @override
     def isCoffeeChat(self) -> bool:
         return True
 
     # @override
-    def getSelfUtility(self):
-        if self.isEmpty():
-            raise Exception("shouldn't call app.getSelfUtility() on an empty app")
-        return self.companyRoom.coffeeChat.companyPref(self.attendee)
+    def getRank(self, att: Attendee) -> int:
+        return self.companyRoom.coffeeChat.companyPref(att)
 
     """
     # @override
@@ -330,6 +537,7 @@ class CoffeeChatAppointment(Appointment):
 
 
 class CompanyPreference:
+    __slots__ = ('company', 'pref')
 
     def __init__(self, company: Company, pref: int):
         self.company = company
@@ -339,26 +547,74 @@ class CompanyPreference:
         return f"{str(self.company.name)} = {self.pref}"
 
 
+NO_PREF = -1 # marks companies missing from an attendee's prefs
+
 class Attendee:
+    __slots__ = (
+        'uid', 'name', 'prefs', 'defaultPref', 'commitments',
+        'sortedCommitments', 'blockStarts', 'blockEnds', 'blockFirstCommitment'
+    )
 
-    def __init__(self, uid: int, name: str, prefs: list[CompanyPreference], commitments: list[TimeInterval]):
+    def __init__(self, uid: int, name: str, prefs: list[CompanyPreference], commitments: list[TimeInterval], defaultPref: int = NO_PREF):
         self.uid = uid
         self.name = name
-        prefs.sort(key = lambda ap: -ap.pref)
-        self.prefsLst = prefs
-        self.prefsDic = {p.company:p.pref for p in prefs}
+        self.prefs = array('i', [NO_PREF]) * (max((p.company.ordinal for p in prefs), default=-1) + 1)
+            # indexed by company ordinal, only the companies the attendee ranked
+        for p in prefs:
+            self.prefs[p.company.ordinal] = p.pref
+        self.defaultPref = defaultPref # pref of the other companies, NO_PREF if they have none
         self.commitments = commitments
-
-    def getPref(self, company) -> int:
-        return self.prefsDic[company]
+        self.setCommitmentBlocks()
+
+    def setCommitmentBlocks(self):
+        """ Merge commitments into sorted, disjoint blocks that can be binary searched """
+
+        sortedCommitments = sorted(self.commitments, key=lambda c: c.timeHash)
+        blockStarts: list[int] = []
+        blockEnds: list[int] = []
+        blockFirstCommitment: list[int] = [] # index into $sortedCommitments
+        for i, commit in enumerate(sortedCommitments):
+            if blockEnds and commit.time <= blockEnds[-1]:
+                blockEnds[-1] = max(blockEnds[-1], commit.end)
+            else:
+                blockStarts.append(commit.time)
+                blockEnds.append(commit.end)
+                blockFirstCommitment.append(i)
+
+        # tuples, so that attendees without commitments share the empty tuple
+        self.sortedCommitments = tuple(sortedCommitments)
+        self.blockStarts = tuple(blockStarts)
+        self.blockEnds = tuple(blockEnds)
+        self.blockFirstCommitment = tuple(blockFirstCommitment)
+
+    def getPref(self, company: Company) -> int:
+        pref = self.prefs[company.ordinal] if company.ordinal < len(self.prefs) else NO_PREF
+        if pref == NO_PREF:
+            pref = self.defaultPref
+            if pref == NO_PREF:
+                raise KeyError(company)
+        return pref
+
+    def hasPref(self, company: Company) -> bool:
+        return self.defaultPref != NO_PREF or (
+            company.ordinal < len(self.prefs) and self.prefs[company.ordinal] != NO_PREF
+        )
 
     def __repr__(self) -> str:
         return str(self.uid)
 
-    def breakAtTime(self, timeInterval: TimeInterval) -> TimeInterval:
-        for commit in self.commitments:
+    def breakAtTime(self, timeInterval: TimeInterval) -> Optional[TimeInterval]:
+        # first block that ends after $timeInterval starts
+        i = bisect_right(self.blockEnds, timeInterval.time)
+        if i == len(self.blockEnds) or timeInterval.end <= self.blockStarts[i]:
+            return None
+
+        # the block is the union of its commitments, so one of them must intersect
+        last = self.blockFirstCommitment[i+1] if i+1 < len(self.blockFirstCommitment) else len(self.sortedCommitments)
+        for commit in self.sortedCommitments[self.blockFirstCommitment[i]:last]:
             if commit.isIntersecting(timeInterval):
                 return commit
+        return None
 
     def isBusy(self, timeInterval: TimeInterval) -> bool:
         return self.breakAtTime(timeInterval) is not None
@@ -366,20 +622,39 @@ class Attendee:
     def getNoCompaniesWant(self, companies: list[Company], isCoffeeChat: Optional[bool]) -> int:
         return len([c for c in companies if c.wantsAttendee(self, isCoffeeChat)])
 
-    def toJson(self):
+    def toJson(self, companies: list[Company]):
         return {
             'name': self.name,
             'commitments': [c.toJson() for c in self.commitments],
-            'prefs': {c.name:p for c,p in self.prefsDic.items()}
+            'prefs': {c.name:self.getPref(c) for c in companies if self.hasPref(c)}
         }
 
-def getJsonSchedule(companies: list[Company], attendees: list[Attendee], conventionTimes: list[TimeInterval]) -> dict:
-    totalRanks, noApps, noAppsChosen, noAtts, varNoApps = getScheduleMetrics(companies)
-    
+def getAttToCoffeeChatRooms(companies: list[Company]) -> dict[Attendee, list[CompanyRoom]]:
+    attToRooms = {}
+    for c in companies:
+        for r in c.rooms:
+            if r.coffeeChat is not None:
+                for att in r.coffeeChat.candidateRanks:
+                    attToRooms.setdefault(att, []).append(r)
+    return attToRooms
+
+def getJsonSchedule(
+        companies: list[Company], 
+        attendees: list[Attendee], 
+        conventionTimes: list[TimeInterval], 
+        metrics: Optional[ScheduleMetrics] = None
+    ) -> dict:
     return {
         'companies': {c.name: c.toJson() for c in companies},
-        'attendees': {a.uid: a.toJson() for a in attendees},
+        'attendees': {a.uid: a.toJson(companies) for a in attendees},
         'conventionTimes': [t.toJson() for t in conventionTimes],
+        **getJsonMetrics(metrics or ScheduleMetrics(companies))
+    }
+
+def getJsonMetrics(metrics: ScheduleMetrics) -> dict:
+    totalRanks, noApps, noAppsChosen, noAtts, varNoApps = metrics.toTuple()
+
+    return {
         'totalUtility': totalRanks,
         'noAppointments': noApps,
         'noAppointmentsNotEmpty': noAppsChosen,
@@ -390,32 +665,79 @@ def getJsonSchedule(companies: list[Company], attendees: list[Attendee], convent
 def getUtility(companies: list[Company]):
     return sum(sum([app.getSelfUtility() for app in c.getAppointments() if not app.isEmpty()]) for c in companies)
 
-def getScheduleMetrics(companies: list[Company]) -> tuple[int, int, int, int]:
-    ranks = []
-    noApps = 0
-    attToNoApps = {}
-
-    for company in companies:
-        for app in company.getAppointments():
-            noApps += 1
-            if app.isEmpty():
-                continue
-            att = app.attendee
-            attToNoApps[att] = attToNoApps.get(att, 0) + 1
-            ranks.append(att.getPref(company))
-    
-    noAppsLst = list(attToNoApps.values())
-    avgNoApps = sum(noAppsLst) / len(noAppsLst)
-    varNoApps = sum((x - avgNoApps)**2 for x in noAppsLst) / len(noAppsLst)
+class ScheduleMetrics:
+    """ Schedule totals, updated in O(1) whenever an appointment changes attendee """
+
+    def __init__(self, companies: list[Company]):
+        self.noApps = 0
+        self.noAppsNotEmpty = 0
+        self.utility = 0 # sum of app.getSelfUtility()
+        self.totalRanks = 0 # sum of attendee prefs, including coffee chats
+        self.attToNoApps: dict[Attendee, int] = {}
+        self.noAppsToNoAtts: dict[int, int] = {} # histogram of $attToNoApps
+
+        for company in companies:
+            for app in company.getAppointments():
+                self.noApps += 1
+                if not app.isEmpty():
+                    self.addAttendee(app, app.attendee)
+
+    def addToHistogram(self, noApps: int, delta: int):
+        if noApps == 0:
+            return
+        noAtts = self.noAppsToNoAtts.get(noApps, 0) + delta
+        if noAtts:
+            self.noAppsToNoAtts[noApps] = noAtts
+        else:
+            del self.noAppsToNoAtts[noApps]
+
+    def addAttendee(self, app: Appointment, att: Attendee, sign: int = 1):
+        noApps = self.attToNoApps.get(att, 0)
+        self.addToHistogram(noApps, -1)
+        self.addToHistogram(noApps + sign, 1)
+        if noApps + sign:
+            self.attToNoApps[att] = noApps + sign
+        else:
+            del self.attToNoApps[att]
+
+        self.noAppsNotEmpty += sign
+        self.utility += sign * app.getRank(att)
+        self.totalRanks += sign * att.getPref(app.company)
+
+    def removeAttendee(self, app: Appointment, att: Attendee):
+        self.addAttendee(app, att, -1)
+
+    def updateAttendee(self, app: Appointment, oldAtt: Optional[Attendee], newAtt: Optional[Attendee]):
+        if oldAtt is not None:
+            self.removeAttendee(app, oldAtt)
+        if newAtt is not None:
+            self.addAttendee(app, newAtt)
+
+    def getNoAttendeesChosen(self) -> int:
+        return len(self.attToNoApps)
+
+    def getVarNoApps(self) -> float:
+        noAtts = self.getNoAttendeesChosen()
+        if noAtts == 0:
+            return 0
+        avgNoApps = self.noAppsNotEmpty / noAtts
+        return sum(
+            count * (noApps - avgNoApps)**2 
+            for noApps, count in self.noAppsToNoAtts.items()
+        ) / noAtts
+
+    def toTuple(self) -> tuple[int, int, int, int, float]:
+        return (
+            self.totalRanks,
+            self.noApps,
+            self.noAppsNotEmpty,
+            self.getNoAttendeesChosen(),
+            self.getVarNoApps()
+        )
+
+def getScheduleMetrics(companies: list[Company]) -> tuple[int, int, int, int, float]:
+    return ScheduleMetrics(companies).toTuple()
 
-    return (
-        sum(ranks),
-        noApps,
-        sum(noAppsLst),
-        len(attToNoApps.keys()),
-        varNoApps
-    )
-    
 
 def canSwapBoth(app1, att1, app2, att2, appIntersects):
     assert(not(app1 is None and app2 is None))
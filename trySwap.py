@@ -2,6 +2,21 @@ from __future__ import annotations
 from serverUtilities import Appointment, AppointmentIntersects, Attendee, Company, ValidationException, TimeInterval, canSwapBoth, getJsonSchedule, swapBoth
 from Schema import *
 
+def throwIfCantSwap(
+            app1: Optional[Appointment], 
+            att1: Optional[Attendee], 
+            app2: Optional[Appointment], 
+            att2: Optional[Attendee],
+            appIntersects: AppointmentIntersects
+        ):
+    """ Raise a ValidationException with the reason if $app1 and $app2 can't swap $att1 and $att2 """
+
+    if not canSwapBoth(app1, att1, app2, att2, appIntersects):
+        reason1 = None if app1 is None else app1.cantSwapReason(att2, appIntersects, app2)
+        reason2 = None if app2 is None else app2.cantSwapReason(att1, appIntersects, app1)
+        reason = reason1 or reason2
+        raise ValidationException(f'Could not swap: {reason}')
+
 def trySwap(
             companies: list[Company], 
             attendees: list[Attendee], 
@@ -9,20 +24,17 @@ def trySwap(
             app1: Optional[Appointment], 
             att1: Optional[Attendee], 
             app2: Optional[Appointment], 
-            att2: Optional[Attendee]
+            att2: Optional[Attendee],
+            getSchedule: Callable[..., dict] = getJsonSchedule
         ) -> dict:
         
     appIntersects = AppointmentIntersects(companies)
 
-    if not canSwapBoth(app1, att1, app2, att2, appIntersects):
-        reason1 = None if app1 is None else app1.cantSwapReason(att2, appIntersects, app2)
-        reason2 = None if app2 is None else app2.cantSwapReason(att1, appIntersects, app1)
-        reason = reason1 or reason2
-        raise ValidationException(f'Could not swap: {reason}')
-
+    throwIfCantSwap(app1, att1, app2, att2, appIntersects)
     swapBoth(app1, att1, app2, att2, appIntersects)
-    return getJsonSchedule(
+    return getSchedule(
         companies, 
         attendees, 
-        interviewTimes
+        interviewTimes,
+        appIntersects.metrics
     )
\ No newline at end of file
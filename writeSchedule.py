@@ -15,6 +15,6 @@ def writeSchedule(filename: str, companies: list[Company]):
                 app.attendee.name,
                 app.companyRoom.name, 
                 str(app.isCoffeeChat()),
-                app.time.strftime(EXCEL_DATETIME_FORMAT), 
-                app.end.strftime(EXCEL_DATETIME_FORMAT)
+                app.getStartDatetime().strftime(EXCEL_DATETIME_FORMAT), 
+                app.getEndDatetime().strftime(EXCEL_DATETIME_FORMAT)
             ])
\ No newline at end of file